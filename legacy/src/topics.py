@@ -3,9 +3,12 @@ Topic Management System for Multi-Product Blog
 Handles topic loading, selection, usage tracking, and Google News integration with product filtering
 """
 
+import copy
 import json
 import os
 import random
+from collections import defaultdict
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from GoogleNews import GoogleNews
@@ -21,6 +24,18 @@ from config.product_content import (
 import re
 
 
+# Keyword lists lowercased once; _is_relevant_news scans them for every news item
+_RELEVANCE_KEYWORDS = tuple(k.lower() for k in GOOGLE_NEWS_CONFIG["relevance_keywords"])
+_EXCLUDE_KEYWORDS = tuple(k.lower() for k in GOOGLE_NEWS_CONFIG["exclude_keywords"])
+
+
+@lru_cache(maxsize=32)
+def _load_topics_snapshot(path: str, mtime_ns: int) -> Dict:
+    """Parse a topics file once per (path, mtime); the result is shared and must not be mutated"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
 class TopicManager:
     """Manages blog topics with Google Sheets integration and multi-product support"""
 
@@ -39,6 +54,8 @@ class TopicManager:
 
         self.topics_file = topics_file
         self.published_file = published_file
+        # True while topics_data still points at the shared cached snapshot
+        self._topics_shared = False
         self.topics_data = self._load_topics()
         self.published_data = self._load_published()
 
@@ -56,10 +73,12 @@ class TopicManager:
             self.google_news_available = False
         
     def _load_topics(self) -> Dict:
-        """Load topics from JSON file"""
+        """Load topics from JSON file (shared read-only snapshot until first mutation)"""
         try:
-            with open(self.topics_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            mtime_ns = os.stat(self.topics_file).st_mtime_ns
+            data = _load_topics_snapshot(self.topics_file, mtime_ns)
+            self._topics_shared = True
+            return data
         except FileNotFoundError:
             logger.error(f"Topics file {self.topics_file} not found")
             return {"topics": [], "categories": [], "google_news_keywords": []}
@@ -76,6 +95,12 @@ class TopicManager:
             logger.warning(f"Published file {self.published_file} not found, creating new one")
             return {"published_articles": [], "last_published": None, "total_published": 0}
     
+    def _ensure_topics_owned(self):
+        """Copy the shared topics snapshot before this instance mutates it"""
+        if self._topics_shared:
+            self.topics_data = copy.deepcopy(self.topics_data)
+            self._topics_shared = False
+
     def _save_topics(self):
         """Save topics data to file"""
         try:
@@ -126,12 +151,14 @@ class TopicManager:
     
     def mark_topic_used(self, topic_id: int, seo_score: int = None) -> bool:
         """Mark a topic as used and update Google Sheets"""
+        self._ensure_topics_owned()
         for topic in self.topics_data["topics"]:
             if topic["id"] == topic_id:
+                now = datetime.now()
                 topic["used"] = True
-                topic["used_date"] = datetime.now().isoformat()
+                topic["used_date"] = now.isoformat()
                 topic["times_used"] = topic.get("times_used", 0) + 1
-                topic["last_used"] = datetime.now().strftime("%Y-%m-%d")
+                topic["last_used"] = now.strftime("%Y-%m-%d")
                 if seo_score:
                     topic["last_seo_score"] = seo_score
                 
@@ -185,7 +212,9 @@ class TopicManager:
             
         try:
             new_topics_found = 0
-            current_year = datetime.now().year
+            # Snapshot the clock once per run; every topic created below shares it
+            now = datetime.now()
+            current_year = now.year
             
             for query in GOOGLE_NEWS_CONFIG["search_queries"]:
                 formatted_query = query.format(current_year=current_year)
@@ -197,8 +226,8 @@ class TopicManager:
                 
                 for result in results[:5]:  # Limit to 5 results per query
                     if self._is_relevant_news(result):
-                        topic = self._create_topic_from_news(result)
-                        if topic and self._add_new_topic(topic):
+                        topic = self._create_topic_from_news(result, now=now)
+                        if topic and self._add_new_topic(topic, now=now):
                             new_topics_found += 1
             
             logger.info(f"Discovered {new_topics_found} new topics from Google News")
@@ -215,29 +244,25 @@ class TopicManager:
         content = f"{title} {desc}"
         
         # Check for relevance keywords
-        relevance_score = 0
-        for keyword in GOOGLE_NEWS_CONFIG["relevance_keywords"]:
-            if keyword.lower() in content:
-                relevance_score += 1
+        relevance_score = sum(1 for keyword in _RELEVANCE_KEYWORDS if keyword in content)
         
         # Check for exclude keywords
-        for exclude_keyword in GOOGLE_NEWS_CONFIG["exclude_keywords"]:
-            if exclude_keyword.lower() in content:
-                relevance_score -= 2
+        relevance_score -= 2 * sum(1 for keyword in _EXCLUDE_KEYWORDS if keyword in content)
         
         # Calculate relevance percentage
-        total_keywords = len(GOOGLE_NEWS_CONFIG["relevance_keywords"])
+        total_keywords = len(_RELEVANCE_KEYWORDS)
         relevance_percentage = relevance_score / total_keywords
         
         return relevance_percentage >= GOOGLE_NEWS_CONFIG["min_relevance_score"]
     
-    def _create_topic_from_news(self, news_item: Dict) -> Optional[Dict]:
+    def _create_topic_from_news(self, news_item: Dict, now: Optional[datetime] = None) -> Optional[Dict]:
         """Create a blog topic from news item"""
+        now = now or datetime.now()
         title = news_item.get('title', '')
         desc = news_item.get('desc', '')
         
         # Generate blog-friendly title
-        blog_title = self._generate_blog_title(title, desc)
+        blog_title = self._generate_blog_title(title, desc, year=now.year)
         if not blog_title:
             return None
         
@@ -256,13 +281,13 @@ class TopicManager:
             "priority": "medium",
             "source": "google_news",
             "original_title": title,
-            "created_date": datetime.now().isoformat()
+            "created_date": now.isoformat()
         }
     
-    def _generate_blog_title(self, news_title: str, news_desc: str) -> Optional[str]:
+    def _generate_blog_title(self, news_title: str, news_desc: str, year: Optional[int] = None) -> Optional[str]:
         """Generate SEO-friendly blog title from news (using configured patterns)"""
         content = f"{news_title} {news_desc}".lower()
-        current_year = datetime.now().year
+        current_year = year or datetime.now().year
 
         # Check configured title patterns
         patterns = TITLE_PATTERNS.get("patterns", [])
@@ -312,15 +337,17 @@ class TopicManager:
         # Return configured default category
         return CATEGORIES.get("default_category", "general")
     
-    def _add_new_topic(self, topic: Dict) -> bool:
+    def _add_new_topic(self, topic: Dict, now: Optional[datetime] = None) -> bool:
         """Add new topic to the collection"""
+        self._ensure_topics_owned()
+
         # Check for duplicates
         for existing_topic in self.topics_data["topics"]:
             if existing_topic["title"].lower() == topic["title"].lower():
                 return False
         
         self.topics_data["topics"].append(topic)
-        self.topics_data["last_updated"] = datetime.now().isoformat()
+        self.topics_data["last_updated"] = (now or datetime.now()).isoformat()
         self._save_topics()
         
         logger.info(f"Added new topic: {topic['title']}")
@@ -336,28 +363,35 @@ class TopicManager:
     
     def get_topic_statistics(self) -> Dict:
         """Get comprehensive topic statistics"""
-        total_topics = len(self.topics_data.get("topics", []))
-        used_topics = len([t for t in self.topics_data.get("topics", []) if t.get("used", False)])
-        unused_topics = total_topics - used_topics
+        total_topics = 0
+        used_topics = 0
+        category_stats = defaultdict(lambda: {"total": 0, "used": 0, "unused": 0})
+
+        # Single pass over topics instead of one scan per category
+        for topic in self.topics_data.get("topics", []):
+            total_topics += 1
+            used = topic.get("used", False)
+            if used:
+                used_topics += 1
+
+            category = topic.get("category")
+            if not category:
+                continue
+            stats = category_stats[category]
+            stats["total"] += 1
+            if used:
+                stats["used"] += 1
+            else:
+                stats["unused"] += 1
 
-        # Extract unique categories from topics
-        categories = set(t.get("category") for t in self.topics_data.get("topics", []) if t.get("category"))
-
-        category_stats = {}
-        for category in categories:
-            category_topics = [t for t in self.topics_data.get("topics", []) if t.get("category") == category]
-            category_stats[category] = {
-                "total": len(category_topics),
-                "used": len([t for t in category_topics if t.get("used", False)]),
-                "unused": len([t for t in category_topics if not t.get("used", False)])
-            }
+        unused_topics = total_topics - used_topics
 
         return {
             "total_topics": total_topics,
             "used_topics": used_topics,
             "unused_topics": unused_topics,
             "usage_percentage": (used_topics / total_topics * 100) if total_topics > 0 else 0,
-            "category_breakdown": category_stats,
+            "category_breakdown": dict(category_stats),
             "total_published": self.published_data.get("total_published", 0),
             "last_published": self.published_data.get("last_published")
         }
@@ -5,9 +5,12 @@ Common helper functions, validation, and utilities
 
 import os
 import re
+import sys
 import json
 import time
+import random
 import hashlib
+from functools import lru_cache, wraps
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
@@ -15,6 +18,66 @@ from loguru import logger
 import unicodedata
 from urllib.parse import quote
 
+try:
+    import xxhash
+except ImportError:
+    # Fallback when xxhash isn't installed; hashes are only compared in-process
+    xxhash = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # RE2 guarantees linear-time matching for the HTML patterns below
+    import re2 as _linear_re
+except ImportError:
+    _linear_re = re
+
+
+# Precompiled patterns shared by the helpers below
+# Script tags, inline event handlers and javascript: links. Applied as separate
+# passes in this order, so a payload rebuilt by one removal is caught by the next
+_SCRIPT_RE = _linear_re.compile(r'(?is)<script[^>]*>.*?</script>')
+_ON_ATTR_RE = _linear_re.compile(r'(?i)on\w+\s*=\s*["\'][^"\']*["\']')
+_JS_HREF_RE = _linear_re.compile(r'(?i)href\s*=\s*["\']javascript:[^"\']*["\']')
+_NON_WORD_RE = re.compile(r'[^\w\s-]')
+_DASH_RE = re.compile(r'[\s_-]+')
+_HTML_TAG_RE = _linear_re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_SLUG_RE = re.compile(r'\A[a-z0-9-]+\Z')
+# YYYY-MM-DD or DD-MM-YYYY, optionally followed by whitespace and HH:MM or HH:MM:SS
+# (any whitespace run, as strptime accepted for the space in its formats)
+_DATETIME_RE = re.compile(
+    r'(?:(?P<year>[0-9]{4})-(?P<month>[0-9]{1,2})-(?P<day>[0-9]{1,2})'
+    r'|(?P<rday>[0-9]{1,2})-(?P<rmonth>[0-9]{1,2})-(?P<ryear>[0-9]{4}))'
+    r'(?:\s+(?P<hour>[0-9]{1,2}):(?P<minute>[0-9]{1,2})(?::(?P<second>[0-9]{1,2}))?)?\Z'
+)
+
+# ASCII slug table: keep alphanumerics, map whitespace/underscore/hyphen to '-', drop the rest
+_SLUG_TABLE = str.maketrans({
+    chr(c): (chr(c) if chr(c).isalnum() else '-' if chr(c).isspace() or chr(c) in '_-' else None)
+    for c in range(128)
+})
+_UNSAFE_FILENAME_CHARS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Common stop words (English and common European)
+_STOP_WORDS = frozenset({
+    # English
+    'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
+    'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
+    'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
+    'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their', 'we', 'our',
+    'you', 'your', 'he', 'she', 'him', 'her', 'his', 'who', 'which', 'what', 'where',
+    'when', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more', 'most', 'other',
+    'some', 'such', 'no', 'not', 'only', 'same', 'so', 'than', 'too', 'very', 'can',
+    # Dutch
+    'de', 'het', 'een', 'van', 'in', 'voor', 'met', 'op', 'te', 'is', 'als', 'bij',
+    'dit', 'dat', 'die', 'deze', 'naar', 'aan', 'om', 'door', 'over', 'tot', 'uit',
+    'ook', 'maar', 'zijn', 'hebben', 'worden', 'kunnen', 'haar', 'hem', 'zij', 'wij'
+})
+
 
 def setup_logging(log_level: str = "INFO", log_file: str = "logs/blog_system.log") -> None:
     """Setup logging configuration"""
@@ -28,7 +91,7 @@ def setup_logging(log_level: str = "INFO", log_file: str = "logs/blog_system.log
     
     # Add console logger
     logger.add(
-        lambda msg: print(msg, end=""),
+        sys.stdout,
         format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         level=log_level,
         colorize=True
@@ -47,19 +110,18 @@ def setup_logging(log_level: str = "INFO", log_file: str = "logs/blog_system.log
     logger.info(f"Logging setup complete. Level: {log_level}, File: {log_file}")
 
 
+# Tuple keeps the "missing" report in a stable, readable order
+_REQUIRED_ENV_VARS = (
+    "OPENAI_API_KEY",
+    "ANTHROPIC_API_KEY",
+    "SUPABASE_URL",
+    "SUPABASE_SERVICE_KEY",
+)
+
+
 def validate_environment() -> bool:
     """Validate that all required environment variables are set"""
-    required_vars = [
-        "OPENAI_API_KEY",
-        "ANTHROPIC_API_KEY", 
-        "SUPABASE_URL",
-        "SUPABASE_SERVICE_KEY"
-    ]
-    
-    missing_vars = []
-    for var in required_vars:
-        if not os.getenv(var):
-            missing_vars.append(var)
+    missing_vars = [var for var in _REQUIRED_ENV_VARS if not os.environ.get(var)]
     
     if missing_vars:
         logger.error(f"Missing required environment variables: {missing_vars}")
@@ -72,28 +134,36 @@ def validate_environment() -> bool:
 def sanitize_html(content: str) -> str:
     """Sanitize HTML content to prevent XSS"""
     # Remove script tags
-    content = re.sub(r'<script[^>]*>.*?</script>', '', content, flags=re.IGNORECASE | re.DOTALL)
-    
+    content = _SCRIPT_RE.sub('', content)
+
     # Remove dangerous attributes
-    content = re.sub(r'on\w+\s*=\s*["\'][^"\']*["\']', '', content, flags=re.IGNORECASE)
-    
+    content = _ON_ATTR_RE.sub('', content)
+
     # Remove javascript: urls
-    content = re.sub(r'href\s*=\s*["\']javascript:[^"\']*["\']', '', content, flags=re.IGNORECASE)
-    
+    content = _JS_HREF_RE.sub('', content)
+
     return content
 
 
+@lru_cache(maxsize=2048)
 def generate_slug(text: str, max_length: int = 50) -> str:
     """Generate URL-friendly slug from text"""
-    # Normalize unicode
-    text = unicodedata.normalize('NFKD', text)
+    # Normalize unicode (decomposes accents so most titles become plain ASCII)
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
     
     # Convert to lowercase
     slug = text.lower()
     
     # Replace spaces and special characters with hyphens
-    slug = re.sub(r'[^\w\s-]', '', slug)
-    slug = re.sub(r'[\s_-]+', '-', slug)
+    if slug.isascii():
+        # Single C-level table lookup per character, then collapse hyphen runs
+        slug = slug.translate(_SLUG_TABLE)
+        while '--' in slug:
+            slug = slug.replace('--', '-')
+    else:
+        slug = _NON_WORD_RE.sub('', slug)
+        slug = _DASH_RE.sub('-', slug)
     
     # Remove leading/trailing hyphens
     slug = slug.strip('-')
@@ -105,44 +175,46 @@ def generate_slug(text: str, max_length: int = 50) -> str:
     return slug
 
 
+@lru_cache(maxsize=8)
+def _keyword_pattern(min_length: int):
+    """Word pattern that only matches words of at least min_length letters"""
+    return re.compile(r'\b[a-zA-Z]{%d,}\b' % max(1, min_length))
+
+
 def extract_keywords(text: str, min_length: int = 3, max_keywords: int = 10) -> List[str]:
     """Extract keywords from text"""
-    # Common stop words (English and common European)
-    stop_words = {
-        # English
-        'the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'of', 'with',
-        'by', 'from', 'as', 'is', 'was', 'are', 'were', 'been', 'be', 'have', 'has', 'had',
-        'do', 'does', 'did', 'will', 'would', 'could', 'should', 'may', 'might', 'must',
-        'this', 'that', 'these', 'those', 'it', 'its', 'they', 'them', 'their', 'we', 'our',
-        'you', 'your', 'he', 'she', 'him', 'her', 'his', 'who', 'which', 'what', 'where',
-        'when', 'why', 'how', 'all', 'each', 'every', 'both', 'few', 'more', 'most', 'other',
-        'some', 'such', 'no', 'not', 'only', 'same', 'so', 'than', 'too', 'very', 'can',
-        # Dutch
-        'de', 'het', 'een', 'van', 'in', 'voor', 'met', 'op', 'te', 'is', 'als', 'bij',
-        'dit', 'dat', 'die', 'deze', 'naar', 'aan', 'om', 'door', 'over', 'tot', 'uit',
-        'ook', 'maar', 'zijn', 'hebben', 'worden', 'kunnen', 'haar', 'hem', 'zij', 'wij'
-    }
-
-    # Extract words
-    words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
-
-    # Filter keywords
+    # Fresh list per call so callers can't mutate the cached result
+    return list(_extract_keywords_cached(text, min_length, max_keywords))
+
+
+# Keyed on whole article texts, so keep only a handful of recent ones alive
+@lru_cache(maxsize=32)
+def _extract_keywords_cached(text: str, min_length: int, max_keywords: int) -> tuple:
+    seen = set()
     keywords = []
-    for word in words:
-        if (len(word) >= min_length and
-            word not in stop_words and
-            word not in keywords):
+    if max_keywords <= 0:
+        return ()
+
+    # Iterate lazily so long documents stop scanning once enough keywords are found
+    # Short words are rejected inside the regex engine rather than in Python
+    for match in _keyword_pattern(min_length).finditer(text.lower()):
+        word = match.group()
+        if (word not in _STOP_WORDS and
+            word not in seen):
+            seen.add(word)
             keywords.append(word)
+            if len(keywords) >= max_keywords:
+                break
 
-    return keywords[:max_keywords]
+    return tuple(keywords)
 
 
 def calculate_reading_time(text: str, words_per_minute: int = 250) -> int:
     """Calculate reading time in minutes"""
-    # Remove HTML tags
-    clean_text = re.sub(r'<[^>]+>', '', text)
+    # Remove HTML tags (skip the regex pass entirely for plain text)
+    clean_text = _HTML_TAG_RE.sub('', text) if '<' in text else text
     
-    # Count words
+    # Count words; str.split runs in C and beats any regex-based counter here
     word_count = len(clean_text.split())
     
     # Calculate reading time
@@ -151,66 +223,84 @@ def calculate_reading_time(text: str, words_per_minute: int = 250) -> int:
     return reading_time
 
 
+_DATE_FORMATS = {
+    "full": "%A, %B %d, %Y",
+    "short": "%B %d, %Y",
+    "iso": "%Y-%m-%d",
+}
+
+
 def format_date(date: datetime, format_type: str = "full") -> str:
     """Format date in standard format"""
-    if format_type == "full":
-        return date.strftime("%A, %B %d, %Y")
-    elif format_type == "short":
-        return date.strftime("%B %d, %Y")
-    elif format_type == "iso":
-        return date.strftime("%Y-%m-%d")
-    else:
-        return date.strftime("%Y-%m-%d")
+    return date.strftime(_DATE_FORMATS.get(format_type, "%Y-%m-%d"))
 
 
 def validate_article_data(article: Dict) -> List[str]:
     """Validate article data structure"""
     errors = []
     
-    # Required fields
-    required_fields = ["title", "content", "slug"]
-    for field in required_fields:
-        if not article.get(field):
-            errors.append(f"Missing required field: {field}")
-    
-    # Title validation
-    title = article.get("title", "")
-    if len(title) < 10:
+    # Missing fields short-circuit the remaining checks for that field
+    title = article.get("title") or ""
+    if not title:
+        errors.append("Missing required field: title")
+    elif len(title) < 10:
         errors.append("Title too short (minimum 10 characters)")
     elif len(title) > 100:
         errors.append("Title too long (maximum 100 characters)")
     
-    # Content validation
-    content = article.get("content", "")
-    if len(content) < 500:
+    content = article.get("content") or ""
+    if not content:
+        errors.append("Missing required field: content")
+    elif len(content) < 500:
         errors.append("Content too short (minimum 500 characters)")
     
-    # Slug validation
-    slug = article.get("slug", "")
-    if not re.match(r'^[a-z0-9-]+$', slug):
+    slug = article.get("slug") or ""
+    if not slug:
+        errors.append("Missing required field: slug")
+    elif not _SLUG_RE.match(slug):
         errors.append("Invalid slug format (only lowercase letters, numbers, and hyphens)")
     
     return errors
 
 
+def _clean_excerpt_head(content: str, max_length: int) -> Optional[str]:
+    """Strip tags and collapse whitespace on a leading window of content only.
+
+    Returns None when the window doesn't yield more than max_length characters,
+    in which case the caller has to process the whole document.
+    """
+    window = max_length * 8
+    if len(content) <= window:
+        return None
+    
+    head = content[:window]
+    # A '<' after the last '>' may close beyond the window; cut before it so the
+    # stripped head is an exact prefix of the stripped document
+    cut = head.find('<', head.rfind('>') + 1)
+    if cut != -1:
+        head = head[:cut]
+    
+    clean_head = ' '.join(_HTML_TAG_RE.sub('', head).split())
+    return clean_head if len(clean_head) > max_length else None
+
+
 def generate_excerpt(content: str, max_length: int = 160) -> str:
     """Generate excerpt from content"""
-    # Remove HTML tags
-    clean_text = re.sub(r'<[^>]+>', '', content)
+    clean_text = _clean_excerpt_head(content, max_length)
     
-    # Remove extra whitespace
-    clean_text = ' '.join(clean_text.split())
+    if clean_text is None:
+        # Remove HTML tags
+        clean_text = _HTML_TAG_RE.sub('', content)
+        
+        # Remove extra whitespace
+        clean_text = ' '.join(clean_text.split())
     
     if len(clean_text) <= max_length:
         return clean_text
     
     # Find last complete sentence within limit
     excerpt = clean_text[:max_length]
-    last_period = excerpt.rfind('.')
-    last_exclamation = excerpt.rfind('!')
-    last_question = excerpt.rfind('?')
-    
-    last_sentence_end = max(last_period, last_exclamation, last_question)
+    last_sentence_end = max(map(excerpt.rfind, '.!?'))
     
     if last_sentence_end > max_length * 0.7:  # If we found a sentence end after 70% of max length
         return excerpt[:last_sentence_end + 1]
@@ -223,15 +313,30 @@ def generate_excerpt(content: str, max_length: int = 160) -> str:
             return excerpt + '...'
 
 
-def hash_content(content: str) -> str:
-    """Generate hash of content for duplicate detection"""
-    return hashlib.md5(content.encode('utf-8')).hexdigest()
+def hash_content(content: str, chunk_size: int = 65536) -> str:
+    """Generate hash of content for duplicate detection (non-cryptographic)"""
+    if len(content) <= chunk_size:
+        if xxhash is not None:
+            return xxhash.xxh3_64_hexdigest(content.encode('utf-8'))
+        return hashlib.md5(content.encode('utf-8')).hexdigest()
+    
+    # Large payloads: encode and feed slices so no full UTF-8 copy is materialized
+    hasher = xxhash.xxh3_64() if xxhash is not None else hashlib.md5()
+    for start in range(0, len(content), chunk_size):
+        hasher.update(content[start:start + chunk_size].encode('utf-8'))
+    return hasher.hexdigest()
+
+
+def clear_text_caches() -> None:
+    """Clear memoized slug and keyword results (e.g. between test runs)"""
+    generate_slug.cache_clear()
+    _extract_keywords_cached.cache_clear()
 
 
 def clean_filename(filename: str) -> str:
     """Clean filename for safe file operations"""
     # Remove or replace unsafe characters
-    filename = re.sub(r'[<>:"/\\|?*]', '_', filename)
+    filename = filename.translate(_UNSAFE_FILENAME_CHARS)
     
     # Remove leading/trailing whitespace and dots
     filename = filename.strip(' .')
@@ -245,12 +350,16 @@ def clean_filename(filename: str) -> str:
     return filename
 
 
+# Swaps English separators for European ones in a single pass
+_EU_SEPARATORS = str.maketrans({',': '.', '.': ','})
+
+
 def format_number(number: Union[int, float], locale: str = "en") -> str:
     """Format number with locale-appropriate separators"""
     if locale in ["nl", "de", "es", "it", "pt"]:
         # European style: 1.234,56
         if isinstance(number, float):
-            return f"{number:,.2f}".replace(',', 'X').replace('.', ',').replace('X', '.')
+            return f"{number:,.2f}".translate(_EU_SEPARATORS)
         else:
             return f"{number:,}".replace(',', '.')
     else:
@@ -269,22 +378,24 @@ def create_backup_filename(prefix: str = "backup", extension: str = "json") -> s
 
 def parse_time_string(time_str: str) -> Optional[datetime]:
     """Parse time string in various formats"""
-    formats = [
-        "%Y-%m-%d %H:%M:%S",
-        "%Y-%m-%d %H:%M",
-        "%Y-%m-%d",
-        "%d-%m-%Y %H:%M:%S",
-        "%d-%m-%Y %H:%M",
-        "%d-%m-%Y"
-    ]
-    
-    for fmt in formats:
-        try:
-            return datetime.strptime(time_str, fmt)
-        except ValueError:
-            continue
+    # Supported: %Y-%m-%d and %d-%m-%Y, each with optional " %H:%M" or " %H:%M:%S"
+    # (the separating space may be any run of whitespace)
+    match = _DATETIME_RE.match(time_str)
+    if not match:
+        return None
     
-    return None
+    year, month, day, rday, rmonth, ryear, hour, minute, second = match.groups()
+    try:
+        return datetime(
+            int(year or ryear),
+            int(month or rmonth),
+            int(day or rday),
+            int(hour or 0),
+            int(minute or 0),
+            int(second or 0)
+        )
+    except ValueError:
+        return None
 
 
 def ensure_directory_exists(path: str) -> bool:
@@ -300,12 +411,16 @@ def ensure_directory_exists(path: str) -> bool:
 def load_json_file(filepath: str, default: Any = None) -> Any:
     """Safely load JSON file with error handling"""
     try:
+        if orjson is not None:
+            with open(filepath, 'rb') as f:
+                return orjson.loads(f.read())
         with open(filepath, 'r', encoding='utf-8') as f:
             return json.load(f)
     except FileNotFoundError:
         logger.warning(f"JSON file not found: {filepath}")
         return default
-    except json.JSONDecodeError as e:
+    except ValueError as e:
+        # json.JSONDecodeError and orjson.JSONDecodeError both subclass ValueError
         logger.error(f"Error parsing JSON file {filepath}: {e}")
         return default
     except Exception as e:
@@ -319,6 +434,11 @@ def save_json_file(data: Any, filepath: str) -> bool:
         # Ensure directory exists
         ensure_directory_exists(os.path.dirname(filepath))
         
+        if orjson is not None:
+            with open(filepath, 'wb') as f:
+                f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+            return True
+        
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         return True
@@ -339,7 +459,7 @@ def truncate_text(text: str, max_length: int, suffix: str = "...") -> str:
 def normalize_whitespace(text: str) -> str:
     """Normalize whitespace in text"""
     # Replace multiple spaces/tabs/newlines with single space
-    text = re.sub(r'\s+', ' ', text)
+    text = _WS_RE.sub(' ', text)
     
     # Strip leading/trailing whitespace
     return text.strip()
@@ -353,48 +473,52 @@ def get_file_size(filepath: str) -> int:
         return 0
 
 
+_SIZE_UNITS = ("B", "KB", "MB", "GB", "TB")
+
+
 def format_file_size(size_bytes: int) -> str:
     """Format file size in human readable format"""
     if size_bytes == 0:
         return "0 B"
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
+    # 1024 == 1 << 10, so the unit index is the bit length divided by 10
     i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024
-        i += 1
+    if size_bytes >= 1024:
+        i = min((int(size_bytes).bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    return f"{size_bytes / (1 << (10 * i)):.1f} {_SIZE_UNITS[i]}"
 
 
 class Timer:
-    """Context manager for timing operations"""
+    """Context manager for timing operations (monotonic, nanosecond clock)"""
+    
+    __slots__ = ("operation_name", "start_ns", "end_ns")
     
     def __init__(self, operation_name: str = "Operation"):
         self.operation_name = operation_name
-        self.start_time = None
-        self.end_time = None
+        self.start_ns = None
+        self.end_ns = None
     
     def __enter__(self):
-        self.start_time = datetime.now()
+        self.start_ns = time.perf_counter_ns()
         logger.debug(f"Starting {self.operation_name}")
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.end_time = datetime.now()
-        duration = (self.end_time - self.start_time).total_seconds()
-        logger.debug(f"Completed {self.operation_name} in {duration:.2f} seconds")
+        self.end_ns = time.perf_counter_ns()
+        logger.debug(f"Completed {self.operation_name} in {self.duration:.2f} seconds")
     
     @property
     def duration(self) -> Optional[float]:
-        if self.start_time and self.end_time:
-            return (self.end_time - self.start_time).total_seconds()
+        if self.start_ns is not None and self.end_ns is not None:
+            return (self.end_ns - self.start_ns) / 1e9
         return None
 
 
-def retry_on_exception(max_attempts: int = 3, delay: float = 1.0):
-    """Decorator for retrying functions on exception"""
+def retry_on_exception(max_attempts: int = 3, delay: float = 1.0, max_delay: float = 30.0):
+    """Decorator for retrying functions on exception with capped exponential backoff and jitter"""
     def decorator(func):
+        @wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             
@@ -404,8 +528,10 @@ def retry_on_exception(max_attempts: int = 3, delay: float = 1.0):
                 except Exception as e:
                     last_exception = e
                     if attempt < max_attempts - 1:
-                        logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}")
-                        time.sleep(delay)
+                        # delay, 2x delay, 4x delay, ... capped, with jitter to desynchronize retries
+                        backoff = min(max_delay, delay * (2 ** attempt)) * (0.5 + random.random())
+                        logger.warning(f"Attempt {attempt + 1} failed for {func.__name__}: {e}; retrying in {backoff:.1f}s")
+                        time.sleep(backoff)
                     else:
                         logger.error(f"All {max_attempts} attempts failed for {func.__name__}")
             
@@ -0,0 +1,19 @@
+-- Migration: Atomic topic usage increment
+-- Lets the worker record a topic use in one request instead of read-then-write,
+-- which also prevents lost increments when generations run concurrently
+
+-- =============================================
+-- 1. INCREMENT TOPIC USAGE
+-- =============================================
+CREATE OR REPLACE FUNCTION public.increment_topic_usage(p_topic_id UUID, p_max_uses INTEGER DEFAULT 1)
+RETURNS void AS $$
+BEGIN
+    UPDATE public.topics
+    SET times_used = COALESCE(times_used, 0) + 1,
+        is_used = (COALESCE(times_used, 0) + 1) >= p_max_uses,
+        used_at = NOW()
+    WHERE id = p_topic_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+COMMENT ON FUNCTION public.increment_topic_usage IS 'Increment times_used and mark the topic used once max_uses is reached';
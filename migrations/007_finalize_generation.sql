@@ -0,0 +1,46 @@
+-- Migration: Finalize a successful generation in one call
+-- Combines the generation log update, topic usage increment and website
+-- schedule update into a single transaction (requires 006_increment_topic_usage)
+
+-- =============================================
+-- 1. FINALIZE GENERATION
+-- =============================================
+CREATE OR REPLACE FUNCTION public.finalize_generation(
+    p_log_id UUID,
+    p_log JSONB,
+    p_topic_id UUID,
+    p_max_uses INTEGER,
+    p_website_id UUID,
+    p_schedule JSONB
+)
+RETURNS void AS $$
+BEGIN
+    -- Generation log
+    IF p_log_id IS NOT NULL THEN
+        UPDATE public.generation_logs
+        SET status = p_log->>'status',
+            completed_at = (p_log->>'completed_at')::TIMESTAMPTZ,
+            article_title = p_log->>'article_title',
+            article_slug = p_log->>'article_slug',
+            api_used = p_log->>'api_used',
+            seo_score = (p_log->>'seo_score')::INTEGER
+        WHERE id = p_log_id;
+    END IF;
+
+    -- Topic usage
+    IF p_topic_id IS NOT NULL THEN
+        PERFORM public.increment_topic_usage(p_topic_id, p_max_uses);
+    END IF;
+
+    -- Website schedule (optional keys keep their current value when absent)
+    UPDATE public.websites
+    SET last_generated_at = (p_schedule->>'last_generated_at')::TIMESTAMPTZ,
+        next_scheduled_at = (p_schedule->>'next_scheduled_at')::TIMESTAMPTZ,
+        last_posting_hour = COALESCE((p_schedule->>'last_posting_hour')::INTEGER, last_posting_hour),
+        format_history = COALESCE(p_schedule->'format_history', format_history),
+        last_api_used = COALESCE(p_schedule->>'last_api_used', last_api_used)
+    WHERE id = p_website_id;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+COMMENT ON FUNCTION public.finalize_generation IS 'Record a successful generation: log, topic usage and next schedule in one transaction';
@@ -5,14 +5,444 @@ Uses HTTP fetch instead of SDKs (required for Pyodide/WebAssembly).
 """
 
 from workers import Response, WorkerEntrypoint
-from js import fetch, Object, console, crypto, Uint8Array, TextDecoder
+from js import (
+    fetch, Object, console, crypto, Uint8Array, TextDecoder,
+    AbortController, setTimeout, clearTimeout
+)
 from pyodide.ffi import to_js
+import asyncio
 import json
 import base64
+import itertools
+import re
+import time
+import traceback
 from datetime import datetime, timedelta
 from typing import Optional
+from urllib.parse import quote, unquote
 import random
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to a JSON string, using orjson when the runtime provides it."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj)
+
+
+def _json_loads(text: str):
+    """Parse a JSON string, using orjson when the runtime provides it."""
+    if orjson is not None:
+        return orjson.loads(text)
+    return json.loads(text)
+
+
+def _encoded_json_string(value: str) -> str:
+    """Return the JSON string literal for a repeated string (system prompt, model), encoding it once."""
+    encoded = _ENCODED_STRING_CACHE.get(value)
+    if encoded is None:
+        if len(_ENCODED_STRING_CACHE) >= _ENCODED_STRING_CACHE_MAX:
+            _ENCODED_STRING_CACHE.clear()
+        encoded = _json_dumps(value)
+        _ENCODED_STRING_CACHE[value] = encoded
+    return encoded
+
+
+def _js_object(values: dict) -> object:
+    """Build a plain JS object from a flat dict by setting properties directly.
+
+    Cheaper than to_js(..., dict_converter=Object.fromEntries), which builds an
+    intermediate entries list first. Values must be strings, numbers or JS objects.
+    """
+    obj = Object.new()
+    for key, value in values.items():
+        setattr(obj, key, value)
+    return obj
+
+
+def _to_uint8array(data: bytes) -> object:
+    """Copy bytes into a new JS Uint8Array in one buffer copy (no per-byte int list)."""
+    array = Uint8Array.new(len(data))
+    array.assign(data)
+    return array
+
+
+def _openai_chat_body(
+    system_prompt: str,
+    prompt: str,
+    max_tokens: int,
+    temperature: float,
+    model: str = "gpt-4o"
+) -> str:
+    """Serialize a system+user chat completion request from the body template."""
+    return _OPENAI_CHAT_BODY % (
+        _encoded_json_string(model),
+        _encoded_json_string(system_prompt),
+        _json_dumps(prompt),
+        max_tokens,
+        float(temperature)
+    )
+
+
+async def _chat_completion_text(response) -> str:
+    """Return the first choice's message text from an OpenAI chat completion response.
+
+    The body is parsed by JS and only the completion string is brought into Python,
+    rather than converting the whole response (ids, usage, logprobs).
+    """
+    data = await response.json()
+    return data.choices[0].message.content
+
+
+async def _anthropic_message_text(response) -> str:
+    """Return the first content block's text from an Anthropic messages response."""
+    data = await response.json()
+    return data.content[0].text
+
+
+def _openai_headers(api_key: str) -> dict:
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+
+def _anthropic_headers(api_key: str) -> dict:
+    return {
+        "x-api-key": api_key,
+        "anthropic-version": "2023-06-01",
+        "Content-Type": "application/json"
+    }
+
+
+def _strip_code_fence(content: str) -> str:
+    """Return the body of a leading ```/```json fence (or the stripped text if unfenced)."""
+    content = content.strip()
+    if content.startswith("```"):
+        end = content.find("```", 3)
+        content = content[3:end] if end != -1 else content[3:]
+        content = content.removeprefix("json")
+    return content
+
+
+def _strip_leading_title(content: str, title: str) -> str:
+    """Drop the title (optionally as a "#" heading) from the first line of content.
+
+    Equivalent to re.sub(rf'^#?\s*{re.escape(title)}\s*\n', '', content, flags=re.IGNORECASE)
+    for stripped titles, without compiling a new pattern for every article title.
+    """
+    title_lower = title.lower()
+    for start in ((1, 0) if content.startswith("#") else (0,)):
+        pos = _LEADING_SPACE_RE.match(content, start).end()
+        end = pos + len(title)
+        if content[pos:end].lower() != title_lower:
+            continue
+        line_end = _SPACE_TO_NEWLINE_RE.match(content, end)
+        if line_end:
+            return content[line_end.end():]
+    return content
+
+
+class _AdaptiveLimiter:
+    """AIMD concurrency limit for one rate-limited third-party API.
+
+    Successful responses raise the limit by one half; 429/5xx responses, or a
+    remaining-requests header under 10% of the quota, halve it. A Retry-After header
+    pauses every caller until it has elapsed. Create one per scan or discovery run
+    and pass it down, so no state (waiters, slots) outlives or crosses requests.
+    """
+
+    def __init__(self, initial: int, minimum: int = 1, maximum: int = 16):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self):
+        while True:
+            # Sit out a Retry-After pause before taking a slot, not while holding one
+            delay = self.paused_until - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            async with self._condition:
+                await self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+                # Another caller's 429 may have started a new pause while this one waited
+                if self.paused_until <= time.monotonic():
+                    self.in_flight += 1
+                    return
+
+    async def release(self, response=None):
+        if response is not None:
+            self._adjust(response)
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def _adjust(self, response):
+        status = response.status
+        if status == 429 or status >= 500:
+            self.limit = max(self.minimum, self.limit * 0.5)
+            retry_after = response.headers.get("retry-after")
+            if retry_after and retry_after.isdigit():
+                self.paused_until = max(self.paused_until, time.monotonic() + int(retry_after))
+            return
+        if not response.ok:
+            return
+        remaining = _header_int(response, "x-ratelimit-remaining-requests")
+        quota = _header_int(response, "x-ratelimit-limit-requests")
+        if remaining is not None and quota and remaining < quota * 0.1:
+            self.limit = max(self.minimum, self.limit * 0.5)
+        else:
+            self.limit = min(self.maximum, self.limit + 0.5)
+
+    async def fetch(self, url: str, options) -> object:
+        """fetch() under the limit; a 429 is retried once after the limiter backs off."""
+        for attempt in range(2):
+            await self.acquire()
+            response = None
+            try:
+                response = await fetch(url, options)
+            finally:
+                await self.release(response)
+            if response.status != 429 or attempt:
+                return response
+
+
+def _ttl_cache_get(cache: dict, key):
+    """Return (True, value) for a live entry of a TTL cache, else (False, None)."""
+    entry = cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        return True, entry[1]
+    return False, None
+
+
+def _ttl_cache_set(cache: dict, key, value, ttl_seconds: float):
+    if len(cache) >= _TTL_CACHE_MAX:
+        cache.clear()
+    cache[key] = (time.monotonic() + ttl_seconds, value)
+
+
+def _header_int(response, name: str) -> Optional[int]:
+    value = response.headers.get(name)
+    return int(value) if value and value.isdigit() else None
+
+
+# Upper bound on websites processed concurrently in batch runs (generation, discovery).
+# Work is dominated by awaited HTTP calls, so overlapping them costs no extra CPU time.
+MAX_CONCURRENT_WEBSITES = 8
+
+# Scanned pages are cut to this many characters before any regex work. Title, meta tags,
+# nav/header and headings sit well inside it; the rest is mostly inlined scripts and SVG.
+MAX_PAGE_HTML_CHARS = 512_000
+
+# Converted JS fetch options ({method, headers}) keyed by method and header items. Header
+# sets repeat across nearly every Supabase/AI call, so each distinct one crosses the JS
+# boundary once; calls with a body copy the prototype with Object.assign.
+_JS_OPTIONS_CACHE = {}
+_JS_OPTIONS_CACHE_MAX = 256
+
+# PostgREST select clauses that embed the per-website rows each batch run needs, so a
+# single websites query replaces one api_keys/topics/website_scans lookup per website
+_GENERATION_SELECT = (
+    "select=*,api_keys(*),topics(*)"
+    "&topics.is_used=eq.false&topics.order=priority.desc&topics.limit=1"
+)
+_SCAN_CONTEXT_SELECT = "select=*,api_keys(*),website_scans(*)"
+
+# PostgREST header dicts keyed by (service key, write, Prefer); built once and shared
+_SUPABASE_HEADERS_CACHE = {}
+
+# Imported AES-GCM CryptoKeys keyed by the base64 key they were imported from
+_CRYPTO_KEY_CACHE = {}
+
+# TTL caches of (expires_at, value) in front of Supabase lookups. System keys are static
+# for the isolate's lifetime in practice; scan rows change when scanned, so their entry is
+# short-lived and dropped whenever this worker writes the row.
+_SYSTEM_KEY_CACHE = {}
+_SYSTEM_KEY_TTL_SECONDS = 300
+_WEBSITE_SCAN_CACHE = {}
+_WEBSITE_SCAN_TTL_SECONDS = 10
+_TTL_CACHE_MAX = 256
+
+# Constant JS objects (WebCrypto arguments, the shared UTF-8 TextDecoder), created once
+# on first use rather than at import, so no JsProxy exists while the module is snapshotted
+_JS_CONSTANTS = {}
+
+# LLM request bodies with the fixed fields pre-serialized; %s slots take JSON-encoded strings
+_OPENAI_CHAT_BODY = (
+    '{"model":%s,"messages":[{"role":"system","content":%s},'
+    '{"role":"user","content":%s}],"max_tokens":%d,"temperature":%r}'
+)
+_ANTHROPIC_ARTICLE_BODY = (
+    '{"model":"claude-sonnet-4-6","max_tokens":4000,"system":%s,'
+    '"messages":[{"role":"user","content":%s}]}'
+)
+
+# Article generation endpoints by api_type; _call_llm adds a provider with one entry
+_LLM_PROVIDERS = {
+    "openai": {
+        "label": "OpenAI",
+        "url": "https://api.openai.com/v1/chat/completions",
+        "headers": _openai_headers,
+        "body": lambda system_prompt, prompt: _openai_chat_body(system_prompt, prompt, 4000, 0.7),
+        "extract": _chat_completion_text,
+    },
+    "claude": {
+        "label": "Anthropic",
+        "url": "https://api.anthropic.com/v1/messages",
+        "headers": _anthropic_headers,
+        "body": lambda system_prompt, prompt: _ANTHROPIC_ARTICLE_BODY % (
+            _encoded_json_string(system_prompt), _json_dumps(prompt)
+        ),
+        "extract": _anthropic_message_text,
+    },
+}
+
+# JSON-encoded system prompts and model names; the same few are sent with every request
+_ENCODED_STRING_CACHE = {}
+_ENCODED_STRING_CACHE_MAX = 64
+
+# Response format instructions shared by both topic discovery prompts
+_DISCOVERY_TOPICS_FORMAT = """Return ONLY a JSON object (no markdown):
+{"topics": [{
+  "title": "How to [Action] for [Specific Outcome]",
+  "keywords": ["long-tail keyword 1", "keyword 2", "keyword 3"],
+  "category": "category_name",
+  "priority": 7,
+  "search_intent": "informational|commercial|transactional|navigational",
+  "timeliness": "evergreen|seasonal|news|trending",
+  "format_hint": "listicle|how_to_guide|deep_dive|comparison|case_study|qa_interview|news_commentary|ultimate_guide",
+  "trending_reason": "Why this topic is relevant now (or null if evergreen)"
+}]}"""
+
+# build_prompt's article prompt; the fixed text is kept once and filled with format_map
+_ARTICLE_PROMPT_TEMPLATE = """Write a {format_name} style blog article.
+
+TOPIC: {title}
+TARGET KEYWORDS: {keywords}
+LANGUAGE: {language}
+CATEGORY: {category}
+FORMAT: {format_name} - {format_description}
+
+{structure_instructions}
+
+HEADING STYLE:
+{heading_instructions}
+
+TONE & VOICE:
+{tone_instructions}
+{genuineness_instructions}
+{geo_instructions}
+
+CRITICAL FORMATTING RULES:
+- Output ONLY the article content - no wrapper or meta text
+- Do NOT wrap in markdown code blocks (no ```)
+- Do NOT include <!DOCTYPE>, <html>, <head>, <body>, <meta>, or <title> tags
+- Do NOT start with "Here is the article" or any meta-commentary
+- Do NOT add HTML comments
+- Use semantic HTML tags: <h2>, <h3>, <p>, <ul>, <li>, <ol>, <div>, <strong>, <em>
+- Start DIRECTLY with the first section content
+
+BEGIN THE ARTICLE NOW:"""
+
+# Default system prompts keyed by (website name, voice style), the only inputs they depend on
+_SYSTEM_PROMPT_CACHE = {}
+_SYSTEM_PROMPT_CACHE_MAX = 128
+
+# save_article: optional blog_articles columns each target database turned out not to
+# have (keyed by target URL), so later saves skip them instead of retrying per column
+_MISSING_ARTICLE_COLUMNS = {}
+_MISSING_COLUMN_RE = re.compile(r"'(\w+)' column")
+
+# parse_article: characters dropped from slugs (anything not alphanumeric or a space,
+# matching str.isalnum), HTML tags and whitespace runs for the plain-text excerpt
+_SLUG_STRIP_RE = re.compile(r"[^\w ]|_")
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_WHITESPACE_RE = re.compile(r"\s+")
+# Tags and whitespace collapsed to one space in a single pass (same result as tag pass
+# then whitespace pass, since each stripped tag became a space)
+_TAG_OR_WHITESPACE_RE = re.compile(r"(?:<[^>]+>|\s)+")
+
+# extract_page_metadata: title, meta description (either attribute order), h1/h2 headings
+# and meta keywords, all collected in one pass over the page
+_PAGE_METADATA_RE = re.compile(
+    r'<title[^>]*>(?P<title>.*?)</title>'
+    r'|<meta[^>]*name=["\']description["\'][^>]*content=["\'](?P<description>[^"\']*)["\']'
+    r'|<meta[^>]*content=["\'](?P<description_reversed>[^"\']*)["\'][^>]*name=["\']description["\']'
+    r'|<(?P<heading>h[12])[^>]*>(?P<heading_text>.*?)</(?P=heading)>'
+    r'|<meta[^>]*name=["\']keywords["\'][^>]*content=["\'](?P<keywords>[^"\']*)["\']',
+    re.IGNORECASE | re.DOTALL
+)
+_KEYWORD_SEPARATOR_RE = re.compile(r"[-–|:,]")
+
+# _extract_keywords_from_text: punctuation replaced before splitting, and common
+# English/Dutch words never used as keywords
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_KEYWORD_STOP_WORDS = frozenset({
+    'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'her',
+    'was', 'one', 'our', 'out', 'het', 'een', 'van', 'voor', 'met', 'zijn'
+})
+
+# optimize_seo: h2/h3 openings counted in one pass, heading and paragraph text, and the
+# FAQ/summary heading fallbacks for GEO scoring
+_H2_H3_OPEN_RE = re.compile(r"<h([23])[^>]*>", re.IGNORECASE)
+_H2_H3_TEXT_RE = re.compile(r"<h[23][^>]*>(.*?)</h[23]>", re.IGNORECASE)
+_PARAGRAPH_RE = re.compile(r"<p[^>]*>(.*?)</p>", re.DOTALL | re.IGNORECASE)
+_FAQ_HEADING_RE = re.compile(
+    r"<h[23][^>]*>[^<]*(?:FAQ|Frequently Asked|Questions|Veelgestelde vragen)[^<]*</h[23]>", re.IGNORECASE
+)
+_QUESTION_HEADING_RE = re.compile(r"<h[23][^>]*>[^<]*\?</h[23]>")
+_SUMMARY_HEADING_RE = re.compile(
+    r"<h[23][^>]*>[^<]*(?:Summary|Key Takeaways|Conclusion|TL;DR|Samenvatting)[^<]*</h[23]>", re.IGNORECASE
+)
+
+# _clean_text: the common HTML entities, decoded in one pass
+_HTML_ENTITIES = {
+    "&amp;": "&", "&lt;": "<", "&gt;": ">", "&quot;": '"', "&#39;": "'", "&nbsp;": " "
+}
+_HTML_ENTITY_RE = re.compile("|".join(_HTML_ENTITIES))
+
+# identify_navigation_links: nav/header sections and the anchors inside them
+_NAV_SECTION_RE = re.compile(r"<nav[^>]*>(.*?)</nav>", re.IGNORECASE | re.DOTALL)
+_HEADER_SECTION_RE = re.compile(r"<header[^>]*>(.*?)</header>", re.IGNORECASE | re.DOTALL)
+_ANCHOR_RE = re.compile(r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>', re.IGNORECASE | re.DOTALL)
+
+# clean_content: code fences, document structure, AI meta-commentary and markdown leftovers
+_CODE_FENCE_OPEN_RE = re.compile(r"```\w*\n?")
+# Alternations are tried left to right at each position, so one pass removes the same
+# tags and blocks the per-tag passes did
+_DOCUMENT_STRUCTURE_RE = re.compile(
+    r"<!DOCTYPE[^>]*>|<html[^>]*>|</html>|<head>.*?</head>|<body[^>]*>|</body>"
+    r"|<meta[^>]*/?>|<title>.*?</title>|<header>.*?</header>",
+    re.IGNORECASE | re.DOTALL
+)
+_META_COMMENTARY_RE = re.compile(
+    "|".join((
+        r'^Here is the \d*\+? ?word .*?:?\s*\n+',
+        r'^Here\'s the .*? article.*?:?\s*\n+',
+        r'^Below is .*?:?\s*\n+',
+        r'^I\'ve written .*?:?\s*\n+',
+        r'^The following is .*?:?\s*\n+',
+        r'^This is .*? article.*?:?\s*\n+',
+        r'^\[.*?word.*?article.*?\]\s*\n+',
+    )),
+    re.IGNORECASE | re.MULTILINE
+)
+_HTML_COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+_LEADING_SPACE_RE = re.compile(r"\s*")
+_SPACE_TO_NEWLINE_RE = re.compile(r"\s*\n")
+_MD_H2_RE = re.compile(r"^## (.+)$", re.MULTILINE)
+_MD_H3_RE = re.compile(r"^### (.+)$", re.MULTILINE)
+_MD_BULLET_RE = re.compile(r"^[*-] (.+)$", re.MULTILINE)
+_BLANK_LINES_RE = re.compile(r"\n{3,}")
+
 # =============================================
 # CONTENT FORMAT DEFINITIONS
 # =============================================
@@ -227,19 +657,98 @@ class Default(WorkerEntrypoint):
 
     def _make_options(self, method: str = "GET", headers: dict = None, body: str = None) -> object:
         """Create JS-compatible fetch options."""
-        options = {"method": method}
-        if headers:
-            options["headers"] = headers
-        if body:
-            options["body"] = body
-        return to_js(options, dict_converter=Object.fromEntries)
+        if headers is not None and not isinstance(headers, dict):
+            # Already a JS headers object, nothing to cache on
+            options = _js_object({"method": method, "headers": headers})
+            if body:
+                options.body = body
+            return options
+
+        prototype = self._options_prototype(method, headers)
+        if not body:
+            return prototype
+        options = Object.assign(Object.new(), prototype)
+        options.body = body
+        return options
+
+    def _options_prototype(self, method: str, headers: Optional[dict]) -> object:
+        """Return cached JS fetch options holding only method and headers."""
+        key = (method, tuple(headers.items()) if headers else ())
+        prototype = _JS_OPTIONS_CACHE.get(key)
+        if prototype is None:
+            if len(_JS_OPTIONS_CACHE) >= _JS_OPTIONS_CACHE_MAX:
+                _JS_OPTIONS_CACHE.clear()
+            prototype = Object.new()
+            prototype.method = method
+            if headers:
+                prototype.headers = _js_object(headers)
+            _JS_OPTIONS_CACHE[key] = prototype
+        return prototype
+
+    def _supabase_headers(self, key: str, write: bool = False, prefer: str = None) -> dict:
+        """Return the shared PostgREST headers dict for a service key (do not mutate it)."""
+        cache_key = (key, write, prefer)
+        headers = _SUPABASE_HEADERS_CACHE.get(cache_key)
+        if headers is None:
+            headers = {
+                "apikey": key,
+                "Authorization": f"Bearer {key}"
+            }
+            if write:
+                headers["Content-Type"] = "application/json"
+            else:
+                # List reads (websites with embedded api_keys/topics, scan arrays)
+                # compress well; Workers fetch decompresses the body transparently
+                headers["Accept-Encoding"] = "gzip"
+            if prefer:
+                headers["Prefer"] = prefer
+            _SUPABASE_HEADERS_CACHE[cache_key] = headers
+        return headers
+
+    def _pop_embedded(self, website: dict, resource: str) -> tuple:
+        """Remove an embedded PostgREST resource from a website row.
+
+        Returns (embedded, row): embedded is False when the query did not embed
+        the resource (caller must fetch it), otherwise row is its first record or
+        None. One-to-one embeds arrive as an object, one-to-many as a list.
+        """
+        if resource not in website:
+            return False, None
+        value = website.pop(resource)
+        if isinstance(value, list):
+            return True, value[0] if value else None
+        return True, value
+
+    def _env(self, name: str, default=None):
+        """Read an env binding once per instance; each self.env access crosses into JS."""
+        cache = getattr(self, "_env_cache", None)
+        if cache is None:
+            cache = self._env_cache = {}
+        if name not in cache:
+            cache[name] = getattr(self.env, name, default)
+        return cache[name]
+
+    def _log_info(self, message: str):
+        """Log an informational message unless LOG_LEVEL is WARN or ERROR.
+
+        Errors keep using console.log directly so they are never suppressed.
+        """
+        enabled = getattr(self, "_info_logging", None)
+        if enabled is None:
+            level = str(self._env("LOG_LEVEL", "INFO")).upper()
+            enabled = level not in ("WARN", "WARNING", "ERROR")
+            self._info_logging = enabled
+        if enabled:
+            console.log(message)
 
     async def _parse_json(self, response) -> any:
-        """Parse JSON response and convert JsProxy to Python native types."""
-        data = await response.json()
-        if hasattr(data, 'to_py'):
-            return data.to_py()
-        return data
+        """Parse a JSON response body into native Python types.
+
+        The body is read as one string and parsed on the Python side, instead of
+        letting JS parse it and then walking the resulting object tree with to_py().
+        """
+        text = await response.text()
+        return _json_loads(text) if text else None
 
     async def _decrypt(self, encrypted_base64: str, key_base64: str) -> str:
         """Decrypt AES-256-GCM encrypted data using WebCrypto API."""
@@ -248,44 +757,57 @@ class Default(WorkerEntrypoint):
         try:
             # Decode base64 to bytes
             encrypted_bytes = base64.b64decode(encrypted_base64)
-            key_bytes = base64.b64decode(key_base64)
 
-            # Extract IV (16 bytes), tag (16 bytes), ciphertext
-            iv = encrypted_bytes[:16]
-            tag = encrypted_bytes[16:32]
-            ciphertext = encrypted_bytes[32:]
+            # Extract IV (16 bytes), tag (16 bytes), ciphertext as views (no copies)
+            view = memoryview(encrypted_bytes)
+            iv = view[:16]
+            tag = view[16:32]
+            ciphertext = view[32:]
 
-            # WebCrypto expects ciphertext + tag concatenated
-            ciphertext_with_tag = ciphertext + tag
+            # WebCrypto expects ciphertext + tag concatenated; write both straight
+            # into one JS buffer instead of concatenating them in Python first
+            iv_js = _to_uint8array(iv)
+            data_js = Uint8Array.new(len(ciphertext) + 16)
+            data_js.subarray(0, len(ciphertext)).assign(ciphertext)
+            data_js.subarray(len(ciphertext)).assign(tag)
 
-            # Convert to JS Uint8Array
-            iv_js = Uint8Array.new(list(iv))
-            key_js = Uint8Array.new(list(key_bytes))
-            data_js = Uint8Array.new(list(ciphertext_with_tag))
-
-            # Import the key
-            crypto_key = await crypto.subtle.importKey(
-                "raw",
-                key_js,
-                to_js({"name": "AES-GCM"}, dict_converter=Object.fromEntries),
-                False,
-                to_js(["decrypt"])
-            )
+            crypto_key = await self._get_crypto_key(key_base64)
 
             # Decrypt
             decrypted = await crypto.subtle.decrypt(
-                to_js({"name": "AES-GCM", "iv": iv_js}, dict_converter=Object.fromEntries),
+                _js_object({"name": "AES-GCM", "iv": iv_js}),
                 crypto_key,
                 data_js
             )
 
-            # Convert result to string
-            decoder = TextDecoder.new()
+            # Convert result to string; TextDecoder is stateless between decode() calls,
+            # so one instance is shared
+            decoder = _JS_CONSTANTS.get("utf8_decoder")
+            if decoder is None:
+                decoder = _JS_CONSTANTS["utf8_decoder"] = TextDecoder.new()
             return decoder.decode(decrypted)
         except Exception as e:
             console.log(f"Decryption error: {str(e)}")
             return None
 
+    async def _get_crypto_key(self, key_base64: str) -> object:
+        """Import the AES-GCM decryption key once per encryption key and reuse it."""
+        crypto_key = _CRYPTO_KEY_CACHE.get(key_base64)
+        if crypto_key is None:
+            if "aes_gcm_algorithm" not in _JS_CONSTANTS:
+                _JS_CONSTANTS["aes_gcm_algorithm"] = _js_object({"name": "AES-GCM"})
+                _JS_CONSTANTS["decrypt_key_usages"] = to_js(["decrypt"])
+            key_bytes = base64.b64decode(key_base64)
+            crypto_key = await crypto.subtle.importKey(
+                "raw",
+                _to_uint8array(key_bytes),
+                _JS_CONSTANTS["aes_gcm_algorithm"],
+                False,
+                _JS_CONSTANTS["decrypt_key_usages"]
+            )
+            _CRYPTO_KEY_CACHE[key_base64] = crypto_key
+        return crypto_key
+
     def _parse_query_params(self, url: str) -> dict:
         """Parse query parameters from URL."""
         params = {}
@@ -343,7 +865,7 @@ class Default(WorkerEntrypoint):
                     ("claude", anthropic_key)
                 ])
 
-            console.log(f"API rotation: last={last_api_used}, selected={selected[0]} for {purpose}")
+            self._log_info(f"API rotation: last={last_api_used}, selected={selected[0]} for {purpose}")
             return selected
 
         # Fallback: use whatever is available
@@ -387,7 +909,7 @@ class Default(WorkerEntrypoint):
 
         try:
             if "/health" in url:
-                return Response(json.dumps({
+                return Response(_json_dumps({
                     "status": "healthy",
                     "service": "seo-content-generator",
                     "timestamp": datetime.now().isoformat()
@@ -399,7 +921,7 @@ class Default(WorkerEntrypoint):
                     result = await self.generate_for_single_website(website_id)
                 else:
                     result = await self.run_generation()
-                return Response(json.dumps(result), headers={"Content-Type": "application/json"})
+                return Response(_json_dumps(result), headers={"Content-Type": "application/json"})
 
             if "/discover-topics" in url or "/discover" in url:
                 # Support single-website discovery with custom count
@@ -408,25 +930,24 @@ class Default(WorkerEntrypoint):
                     result = await self.discover_for_single_website(website_id, count)
                 else:
                     result = await self.discover_all_topics()
-                return Response(json.dumps(result), headers={"Content-Type": "application/json"})
+                return Response(_json_dumps(result), headers={"Content-Type": "application/json"})
 
             if "/scan-preview" in url:
                 # Preview scan - accepts domain directly, returns data without storing
                 domain = params.get("domain")
                 if domain:
                     # URL decode the domain
-                    from urllib.parse import unquote
                     domain = unquote(domain)
-                    console.log(f"scan-preview: Starting for domain {domain}")
+                    self._log_info(f"scan-preview: Starting for domain {domain}")
                     result = await self.scan_preview(domain)
-                    console.log(f"scan-preview: Completed, success={result.get('success')}")
+                    self._log_info(f"scan-preview: Completed, success={result.get('success')}")
                 else:
                     result = {"error": "domain parameter required", "success": False}
                     console.log("scan-preview: No domain provided")
 
                 # Serialize the response
-                response_body = json.dumps(result)
-                console.log(f"scan-preview: Sending response ({len(response_body)} bytes)")
+                response_body = _json_dumps(result)
+                self._log_info(f"scan-preview: Sending response ({len(response_body)} bytes)")
 
                 return Response(response_body, headers={
                     "Content-Type": "application/json",
@@ -440,10 +961,10 @@ class Default(WorkerEntrypoint):
                 website_id_body = body.get("website_id")
                 pages = body.get("pages", [])
                 if not website_id_body or not pages:
-                    return Response(json.dumps({"error": "website_id and pages required", "success": False}),
+                    return Response(_json_dumps({"error": "website_id and pages required", "success": False}),
                                     status=400, headers={"Content-Type": "application/json"})
                 result = await self.analyze_text_content(website_id_body, pages)
-                return Response(json.dumps(result), headers={
+                return Response(_json_dumps(result), headers={
                     "Content-Type": "application/json",
                     "Access-Control-Allow-Origin": "*",
                 })
@@ -454,9 +975,9 @@ class Default(WorkerEntrypoint):
                     result = await self.scan_single_website(website_id)
                 else:
                     result = await self.scan_all_websites()
-                return Response(json.dumps(result), headers={"Content-Type": "application/json"})
+                return Response(_json_dumps(result), headers={"Content-Type": "application/json"})
 
-            return Response(json.dumps({
+            return Response(_json_dumps({
                 "message": "SEO Content Generator Worker",
                 "endpoints": ["/health", "/trigger", "/generate", "/discover", "/scan", "/scan-preview"],
                 "single_website": "Add ?website_id=xxx to target a specific website",
@@ -465,9 +986,8 @@ class Default(WorkerEntrypoint):
 
         except Exception as e:
             console.log(f"Request error: {str(e)}")
-            import traceback
             console.log(f"Traceback: {traceback.format_exc()}")
-            return Response(json.dumps({"error": str(e), "success": False}),
+            return Response(_json_dumps({"error": str(e), "success": False}),
                           status=500,
                           headers={
                               "Content-Type": "application/json",
@@ -478,15 +998,15 @@ class Default(WorkerEntrypoint):
 
     async def scheduled(self, event, env, ctx):
         """Handle cron trigger - runs every hour."""
-        console.log("Cron triggered: checking for scheduled generations")
+        self._log_info("Cron triggered: checking for scheduled generations")
         await self.run_generation()
 
     async def run_generation(self) -> dict:
         """Main generation logic - check websites and generate content."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 console.log("Missing required environment variables")
@@ -495,19 +1015,25 @@ class Default(WorkerEntrypoint):
             websites = await self.get_websites_due(supabase_url, supabase_key)
 
             if not websites:
-                console.log("No websites due for generation")
+                self._log_info("No websites due for generation")
                 return {"message": "No websites due for generation", "processed": 0}
 
-            processed = 0
+            # Workers pull websites off a shared queue, so a slow website only
+            # holds up its own worker while the rest keep draining the batch
+            queue = asyncio.Queue()
             for website in websites:
-                try:
-                    success = await self.process_website(
-                        website, supabase_url, supabase_key, encryption_key
-                    )
-                    if success:
-                        processed += 1
-                except Exception as e:
-                    console.log(f"Error processing website {website.get('name')}: {str(e)}")
+                queue.put_nowait(website)
+            results = []
+            workers = [
+                asyncio.ensure_future(self._generation_worker(
+                    queue, results, supabase_url, supabase_key, encryption_key
+                ))
+                for _ in range(min(MAX_CONCURRENT_WEBSITES, len(websites)))
+            ]
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            processed = sum(1 for success in results if success)
 
             return {"message": f"Processed {processed} websites", "processed": processed}
 
@@ -515,21 +1041,41 @@ class Default(WorkerEntrypoint):
             console.log(f"Generation error: {str(e)}")
             return {"error": str(e)}
 
+    async def _generation_worker(
+        self,
+        queue: asyncio.Queue,
+        results: list,
+        supabase_url: str,
+        supabase_key: str,
+        encryption_key: str
+    ) -> None:
+        """Process websites from the queue until cancelled; errors only fail that website."""
+        while True:
+            website = await queue.get()
+            try:
+                results.append(await self.process_website(
+                    website, supabase_url, supabase_key, encryption_key
+                ))
+            except Exception as e:
+                console.log(f"Error processing website {website.get('name')}: {str(e)}")
+                results.append(False)
+            finally:
+                queue.task_done()
+
     async def get_websites_due(self, supabase_url: str, supabase_key: str) -> list:
-        """Fetch websites that are due for content generation."""
+        """Fetch websites that are due for content generation.
+
+        Each website embeds its api_keys rows and its top unused topic, so
+        process_website does not need separate lookups for them.
+        """
         now = datetime.now().isoformat()
-        url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&next_scheduled_at=lte.{now}&select=*"
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json"
-        }
+        url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&next_scheduled_at=lte.{now}&{_GENERATION_SELECT}"
+        headers = self._supabase_headers(supabase_key, write=True)
 
         response = await fetch(url, self._make_options("GET", headers))
 
         if response.ok:
-            data = await self._parse_json(response)
-            return data if data else []
+            return await self._parse_json(response) or []
         return []
 
     async def process_website(
@@ -541,10 +1087,15 @@ class Default(WorkerEntrypoint):
     ) -> bool:
         """Process a single website - generate and publish article."""
         website_id = website.get("id")
-        console.log(f"Processing website: {website.get('name')}")
+        self._log_info(f"Processing website: {website.get('name')}")
+
+        # Use rows embedded by _GENERATION_SELECT when present, else fetch them
+        embedded, api_keys = self._pop_embedded(website, "api_keys")
+        embedded_topics = website.pop("topics", None)
 
         # Get API keys
-        api_keys = await self.get_api_keys(website_id, supabase_url, supabase_key)
+        if not embedded:
+            api_keys = await self.get_api_keys(website_id, supabase_url, supabase_key)
         if not api_keys:
             console.log(f"No API keys for website {website.get('name')}")
             return False
@@ -559,22 +1110,24 @@ class Default(WorkerEntrypoint):
             console.log("Missing target database credentials")
             return False
 
-        # Decrypt the keys
-        openai_key = await self._decrypt(openai_key_encrypted, encryption_key) if openai_key_encrypted else None
-        anthropic_key = await self._decrypt(anthropic_key_encrypted, encryption_key) if anthropic_key_encrypted else None
-        target_key = await self._decrypt(target_key_encrypted, encryption_key) if target_key_encrypted else None
+        # Decrypt the keys concurrently (_decrypt returns None for missing values)
+        openai_key, anthropic_key, target_key = await asyncio.gather(
+            self._decrypt(openai_key_encrypted, encryption_key),
+            self._decrypt(anthropic_key_encrypted, encryption_key),
+            self._decrypt(target_key_encrypted, encryption_key)
+        )
 
-        console.log(f"Per-website keys - OpenAI: {openai_key is not None}, Anthropic: {anthropic_key is not None}, Target: {target_key is not None}")
+        self._log_info(f"Per-website keys - OpenAI: {openai_key is not None}, Anthropic: {anthropic_key is not None}, Target: {target_key is not None}")
 
         # Fallback to platform keys if no per-website AI keys
         if not openai_key and not anthropic_key:
-            platform_openai = getattr(self.env, "PLATFORM_OPENAI_KEY", None)
-            platform_anthropic = getattr(self.env, "PLATFORM_ANTHROPIC_KEY", None)
+            platform_openai = self._env("PLATFORM_OPENAI_KEY", None)
+            platform_anthropic = self._env("PLATFORM_ANTHROPIC_KEY", None)
 
             if platform_openai or platform_anthropic:
                 openai_key = platform_openai
                 anthropic_key = platform_anthropic
-                console.log(f"Using platform keys - OpenAI: {openai_key is not None}, Anthropic: {anthropic_key is not None}")
+                self._log_info(f"Using platform keys - OpenAI: {openai_key is not None}, Anthropic: {anthropic_key is not None}")
             else:
                 console.log("No AI API keys (per-website or platform)")
                 return False
@@ -584,38 +1137,61 @@ class Default(WorkerEntrypoint):
             return False
 
         # Get next topic (with reuse support)
-        topic = await self.get_next_topic(website_id, website, supabase_url, supabase_key, openai_key)
+        topic = await self.get_next_topic(
+            website_id, website, supabase_url, supabase_key, openai_key,
+            unused_topics=embedded_topics
+        )
         if not topic:
             console.log(f"No topics available and auto-generation disabled for {website.get('name')}")
             return False
 
-        # Create generation log
-        log_id = await self.create_generation_log(
-            website_id, topic.get("id"), supabase_url, supabase_key
-        )
+        # Create generation log; the insert runs alongside article generation
+        # and is only awaited when the log id is first needed
+        started_iso = datetime.now().isoformat()
+        log_task = asyncio.ensure_future(self.create_generation_log(
+            website_id, topic.get("id"), supabase_url, supabase_key,
+            now_iso=started_iso
+        ))
 
-        # Generate article with API rotation
-        api_used, api_key = self.select_api_provider(
-            website, openai_key, anthropic_key, purpose="article"
-        )
+        try:
+            # Generate article with API rotation
+            api_used, api_key = self.select_api_provider(
+                website, openai_key, anthropic_key, purpose="article"
+            )
 
-        if not api_key:
-            console.log("No API key available after selection")
-            return False
+            if not api_key:
+                console.log("No API key available after selection")
+                await log_task
+                return False
 
-        # Try primary API, fallback to other if it fails
-        article = await self.generate_article(topic, website, api_used, api_key)
+            # Try primary API, fallback to other if it fails
+            article = await self.generate_article(topic, website, api_used, api_key)
 
-        # Fallback: try the other API if primary fails
-        if not article:
-            fallback_api = "claude" if api_used == "openai" else "openai"
-            fallback_key = anthropic_key if api_used == "openai" else openai_key
+            # Fallback: try the other API if primary fails
+            if not article:
+                fallback_api = "claude" if api_used == "openai" else "openai"
+                fallback_key = anthropic_key if api_used == "openai" else openai_key
+
+                if fallback_key:
+                    console.log(f"Primary API ({api_used}) failed, trying fallback ({fallback_api})")
+                    article = await self.generate_article(topic, website, fallback_api, fallback_key)
+                    if article:
+                        api_used = fallback_api  # Update for logging
 
-            if fallback_key:
-                console.log(f"Primary API ({api_used}) failed, trying fallback ({fallback_api})")
-                article = await self.generate_article(topic, website, fallback_api, fallback_key)
-                if article:
-                    api_used = fallback_api  # Update for logging
+            log_id = await log_task
+        except Exception as e:
+            # Mark the log failed instead of leaving it in its started state
+            # (the insert itself may be what raised, so don't re-raise from it)
+            log_id, = await asyncio.gather(log_task, return_exceptions=True)
+            if log_id and not isinstance(log_id, BaseException):
+                await self.update_generation_log(
+                    log_id, "failed", f"Content generation error: {str(e)}", supabase_url, supabase_key
+                )
+            raise
+        finally:
+            # Only still pending if this run was cancelled mid-generation
+            if not log_task.done():
+                log_task.cancel()
 
         if not article:
             await self.update_generation_log(
@@ -640,7 +1216,7 @@ class Default(WorkerEntrypoint):
         if partners:
             backlinks = self._select_backlinks(article, partners)
             if backlinks:
-                console.log(f"Inserting {len(backlinks)} backlinks into article")
+                self._log_info(f"Inserting {len(backlinks)} backlinks into article")
                 article["content"] = self._insert_backlinks(
                     article.get("content", ""),
                     backlinks,
@@ -652,7 +1228,7 @@ class Default(WorkerEntrypoint):
                     "anchor_text": b["anchor_text"],
                     "partner_name": b["partner_name"],
                     "partner_domain": b["partner_domain"],
-                    "inserted_at": datetime.now().isoformat()
+                    "inserted_at": started_iso
                 } for b in backlinks]
                 # Save partner IDs for stats update after successful save
                 article["_partner_ids"] = [b["partner_id"] for b in backlinks if b.get("partner_id")]
@@ -667,51 +1243,32 @@ class Default(WorkerEntrypoint):
             )
             return False
 
-        await self.update_generation_log(
-            log_id, "success", None, supabase_url, supabase_key,
-            article_title=article.get("title"),
-            article_slug=article.get("slug"),
-            api_used=api_used,
-            seo_score=article.get("seo_score", 0)
-        )
-
-        # Mark topic as used (with times_used increment)
-        await self.mark_topic_used(topic.get("id"), website, supabase_url, supabase_key)
-
-        # Update partner backlink stats (if any backlinks were inserted)
+        # Update log, mark topic as used and reschedule website in one round-trip,
+        # alongside the partner backlink stats (if any backlinks were inserted)
         partner_ids = article.get("_partner_ids", [])
-        if partner_ids:
-            await self._update_partner_stats(partner_ids, supabase_url, supabase_key)
-            console.log(f"Updated stats for {len(partner_ids)} partner(s)")
-
-        # Update schedule with time variation, format tracking, and API rotation
-        await self.update_website_schedule(
-            website_id,
-            website.get("days_between_posts", 3),
-            supabase_url,
-            supabase_key,
-            website=website,
-            content_format=article.get("content_format"),
-            api_used=api_used
+        await asyncio.gather(
+            self.finalize_generation(
+                log_id, topic.get("id"), website, article, api_used, supabase_url, supabase_key
+            ),
+            self._update_partner_stats(partner_ids, supabase_url, supabase_key)
         )
+        if partner_ids:
+            self._log_info(f"Updated stats for {len(partner_ids)} partner(s)")
 
-        console.log(f"Successfully generated: {article.get('title')} (format: {article.get('content_format', 'default')})")
+        self._log_info(f"Successfully generated: {article.get('title')} (format: {article.get('content_format', 'default')})")
         return True
 
     async def get_api_keys(self, website_id: str, supabase_url: str, supabase_key: str) -> Optional[dict]:
         """Fetch API keys for a website."""
         url = f"{supabase_url}/rest/v1/api_keys?website_id=eq.{website_id}&select=*"
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
+        headers = self._supabase_headers(supabase_key)
 
         response = await fetch(url, self._make_options("GET", headers))
 
         if response.ok:
             data = await self._parse_json(response)
-            return dict(data[0]) if data and len(data) > 0 else None
+            return data[0] if data else None
         return None
 
     async def get_next_topic(
@@ -720,7 +1277,8 @@ class Default(WorkerEntrypoint):
         website: dict,
         supabase_url: str,
         supabase_key: str,
-        openai_key: str = None
+        openai_key: str = None,
+        unused_topics: list = None
     ) -> Optional[dict]:
         """Get the next topic for a website.
 
@@ -728,37 +1286,43 @@ class Default(WorkerEntrypoint):
         - Topic reuse (max_topic_uses setting)
         - Auto-generation when no topics (auto_generate_topics setting)
         - Context-aware generation using website scan data
+
+        unused_topics is the already-fetched unused-topic lookup (as embedded by
+        get_websites_due); when given, the first query is skipped.
         """
         max_uses = website.get("max_topic_uses", 1)
         auto_generate = website.get("auto_generate_topics", False)
 
-        # First try to get unused topic
-        url = f"{supabase_url}/rest/v1/topics?website_id=eq.{website_id}&is_used=eq.false&order=priority.desc&limit=1"
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
-
-        response = await fetch(url, self._make_options("GET", headers))
-
-        if response.ok:
-            data = await self._parse_json(response)
-            if data and len(data) > 0:
-                return dict(data[0])
+        headers = self._supabase_headers(supabase_key)
+
+        topics_url = f"{supabase_url}/rest/v1/topics?website_id=eq.{website_id}"
+        if unused_topics is not None:
+            # Unused-topic lookup already done by the caller
+            if unused_topics:
+                return unused_topics[0]
+            url = None
+            if max_uses > 1:
+                url = f"{topics_url}&times_used=lt.{max_uses}&order=priority.desc,times_used.asc&limit=1"
+        elif max_uses > 1:
+            # Unused topics first, then reusable ones, in a single query
+            url = (
+                f"{topics_url}&or=(is_used.eq.false,times_used.lt.{max_uses})"
+                f"&order=is_used.asc,priority.desc,times_used.asc&limit=1"
+            )
+        else:
+            url = f"{topics_url}&is_used=eq.false&order=priority.desc&limit=1"
 
-        # If max_uses > 1, try to get reusable topic
-        if max_uses > 1:
-            url = f"{supabase_url}/rest/v1/topics?website_id=eq.{website_id}&times_used=lt.{max_uses}&order=priority.desc,times_used.asc&limit=1"
+        if url:
             response = await fetch(url, self._make_options("GET", headers))
 
             if response.ok:
                 data = await self._parse_json(response)
-                if data and len(data) > 0:
-                    return dict(data[0])
+                if data:
+                    return data[0]
 
         # If auto_generate is enabled and we have an API key, generate a topic
         if auto_generate and openai_key:
-            console.log("No topics available, auto-generating with context...")
+            self._log_info("No topics available, auto-generating with context...")
 
             # Get scan data for context-aware generation
             scan_data = await self.get_website_scan(website_id, supabase_url, supabase_key)
@@ -788,15 +1352,18 @@ class Default(WorkerEntrypoint):
 
         # Build context-aware prompt if scan data is available
         if scan_data and scan_data.get("niche_description"):
+            themes = scan_data.get("content_themes") or []
+            main_keywords = scan_data.get("main_keywords") or []
+            headings = scan_data.get("headings") or []
             prompt = f"""Generate a single blog topic for this website.
 
 WEBSITE CONTEXT (from actual website scan):
 - Website Name: {website.get('name')}
 - Domain: {website.get('domain')}
 - Niche: {scan_data.get('niche_description', 'N/A')}
-- Main Themes: {', '.join(scan_data.get('content_themes', [])[:5])}
-- Key Topics Found: {', '.join(scan_data.get('main_keywords', [])[:10])}
-- Sample Headings: {', '.join(scan_data.get('headings', [])[:5])}
+- Main Themes: {', '.join(themes[:5])}
+- Key Topics Found: {', '.join(main_keywords[:10])}
+- Sample Headings: {', '.join(headings[:5])}
 
 IMPORTANT: The topic MUST be relevant to the actual website content described above.
 Do NOT generate generic topics based only on the domain name.
@@ -819,20 +1386,12 @@ The topic should be:
 Return ONLY a JSON object (no markdown, no code blocks):
 {{"title": "Blog Post Title Here", "keywords": ["keyword1", "keyword2", "keyword3"], "category": "category_name", "priority": 7}}"""
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = _openai_headers(api_key)
 
-        body = json.dumps({
-            "model": "gpt-4o",
-            "messages": [
-                {"role": "system", "content": "You are a content strategist. Return only valid JSON, no markdown."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 500,
-            "temperature": 0.8
-        })
+        body = _openai_chat_body(
+            "You are a content strategist. Return only valid JSON, no markdown.",
+            prompt, 500, 0.8
+        )
 
         try:
             response = await fetch(
@@ -841,15 +1400,10 @@ Return ONLY a JSON object (no markdown, no code blocks):
             )
 
             if response.ok:
-                data = await self._parse_json(response)
-                content = data["choices"][0]["message"]["content"]
+                content = await _chat_completion_text(response)
                 # Clean up potential markdown formatting
-                content = content.strip()
-                if content.startswith("```"):
-                    content = content.split("```")[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                return json.loads(content)
+                content = _strip_code_fence(content)
+                return _json_loads(content)
             else:
                 error = await response.text()
                 console.log(f"Topic generation error: {error}")
@@ -866,7 +1420,12 @@ Return ONLY a JSON object (no markdown, no code blocks):
         supabase_key: str
     ) -> Optional[dict]:
         """Save a generated topic to the database with enhanced metadata for SEO/GEO."""
-        data = {
+        saved = await self.save_generated_topics_bulk(website_id, [topic], supabase_url, supabase_key)
+        return saved[0] if saved else None
+
+    def _topic_row(self, website_id: str, topic: dict) -> dict:
+        """Build the topics table row for a generated topic."""
+        return {
             "website_id": website_id,
             "title": topic.get("title"),
             "keywords": topic.get("keywords", []),
@@ -882,77 +1441,91 @@ Return ONLY a JSON object (no markdown, no code blocks):
             "trending_reason": topic.get("trending_reason")
         }
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
-        }
+    async def save_generated_topics_bulk(
+        self,
+        website_id: str,
+        topics: list,
+        supabase_url: str,
+        supabase_key: str
+    ) -> list:
+        """Insert several generated topics in one request. Returns the saved rows."""
+        if not topics:
+            return []
+
+        data = [self._topic_row(website_id, topic) for topic in topics]
 
+        headers = self._supabase_headers(supabase_key, write=True, prefer="return=representation")
+
+        # PostgREST inserts every element of a JSON array body in a single statement
         response = await fetch(
             f"{supabase_url}/rest/v1/topics",
-            self._make_options("POST", headers, json.dumps(data))
+            self._make_options("POST", headers, _json_dumps(data))
         )
 
         if response.ok:
             result = await self._parse_json(response)
-            return dict(result[0]) if result else None
-        return None
+            return [dict(row) for row in result] if result else []
+
+        error_text = await response.text()
+        console.log(f"Failed to save topics: {error_text}")
+        if len(data) == 1:
+            return []
+
+        # One bad row (e.g. a CHECK violation) rejects the whole statement,
+        # so retry row by row and keep whatever the database accepts
+        responses = await asyncio.gather(*[
+            fetch(
+                f"{supabase_url}/rest/v1/topics",
+                self._make_options("POST", headers, _json_dumps(row))
+            )
+            for row in data
+        ])
+
+        saved = []
+        for row, row_response in zip(data, responses):
+            if row_response.ok:
+                result = await self._parse_json(row_response)
+                if result:
+                    saved.append(dict(result[0]))
+            else:
+                error_text = await row_response.text()
+                console.log(f"Failed to save topic '{row.get('title')}': {error_text}")
+        return saved
 
     async def discover_all_topics(self) -> dict:
         """Discover topics for all active websites."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables"}
 
-            # Get all active websites
-            url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&select=*"
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            }
+            # Get all active websites (with their api keys and scan)
+            url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&{_SCAN_CONTEXT_SELECT}"
+            headers = self._supabase_headers(supabase_key)
 
             response = await fetch(url, self._make_options("GET", headers))
 
             if not response.ok:
                 return {"error": "Failed to fetch websites"}
 
-            websites = list(await self._parse_json(response))
-            console.log(f"Discovering topics for {len(websites)} websites")
-            discovered = 0
-
-            for website in websites:
-                api_keys = await self.get_api_keys(website.get("id"), supabase_url, supabase_key)
-                if api_keys and api_keys.get("openai_api_key_encrypted"):
-                    # Decrypt the API key before using
-                    openai_key = await self._decrypt(api_keys.get("openai_api_key_encrypted"), encryption_key)
-                    if not openai_key:
-                        console.log(f"Failed to decrypt OpenAI key for {website.get('name')}")
-                        continue
-
-                    # First ensure website is scanned (for context-aware discovery)
-                    existing_scan = await self.get_website_scan(website.get("id"), supabase_url, supabase_key)
-                    if not existing_scan or existing_scan.get("scan_status") != "completed":
-                        console.log(f"Scanning {website.get('name')} before topic discovery...")
-                        await self.scan_website(website, openai_key, supabase_url, supabase_key)
-
-                    # Discover topics with scan context and Google Search
-                    topics = await self.discover_topics_for_website(
-                        website,
-                        openai_key,
-                        supabase_url,
-                        supabase_key,
-                        encryption_key  # Pass for Google Search API
-                    )
-                    if topics:
-                        console.log(f"Discovered {len(topics)} topics for {website.get('name')}")
-                    discovered += len(topics) if topics else 0
-                else:
-                    console.log(f"Skipping {website.get('name')} - no OpenAI API key")
+            websites = await self._parse_json(response) or []
+            self._log_info(f"Discovering topics for {len(websites)} websites")
+
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_WEBSITES)
+            # Adaptive concurrency for the rate-limited APIs, scoped to this run
+            search_limiter = _AdaptiveLimiter(initial=4)
+            analysis_limiter = _AdaptiveLimiter(initial=4)
+            counts = await asyncio.gather(*[
+                self._discover_website_topics_guarded(
+                    semaphore, website, supabase_url, supabase_key, encryption_key,
+                    search_limiter=search_limiter, analysis_limiter=analysis_limiter
+                )
+                for website in websites
+            ])
+            discovered = sum(counts)
 
             return {"message": f"Discovered {discovered} topics", "discovered": discovered}
 
@@ -960,48 +1533,114 @@ Return ONLY a JSON object (no markdown, no code blocks):
             console.log(f"Discovery error: {str(e)}")
             return {"error": str(e)}
 
+    async def _discover_website_topics_guarded(
+        self,
+        semaphore: asyncio.Semaphore,
+        website: dict,
+        supabase_url: str,
+        supabase_key: str,
+        encryption_key: str,
+        search_limiter: Optional[_AdaptiveLimiter] = None,
+        analysis_limiter: Optional[_AdaptiveLimiter] = None
+    ) -> int:
+        """Discover topics for one website under the concurrency limit. Returns topics found."""
+        async with semaphore:
+            try:
+                has_keys, api_keys = self._pop_embedded(website, "api_keys")
+                has_scan, existing_scan = self._pop_embedded(website, "website_scans")
+                if not has_keys:
+                    api_keys = await self.get_api_keys(website.get("id"), supabase_url, supabase_key)
+                if not api_keys or not api_keys.get("openai_api_key_encrypted"):
+                    self._log_info(f"Skipping {website.get('name')} - no OpenAI API key")
+                    return 0
+
+                # Decrypt the API key before using
+                openai_key = await self._decrypt(api_keys.get("openai_api_key_encrypted"), encryption_key)
+                if not openai_key:
+                    console.log(f"Failed to decrypt OpenAI key for {website.get('name')}")
+                    return 0
+
+                # First ensure website is scanned (for context-aware discovery)
+                if not has_scan:
+                    existing_scan = await self.get_website_scan(website.get("id"), supabase_url, supabase_key)
+                if not existing_scan or existing_scan.get("scan_status") != "completed":
+                    self._log_info(f"Scanning {website.get('name')} before topic discovery...")
+                    await self.scan_website(
+                        website, openai_key, supabase_url, supabase_key, limiter=analysis_limiter
+                    )
+                    existing_scan = None  # Stale now; let discovery read the fresh scan
+
+                # Discover topics with scan context and Google Search
+                topics = await self.discover_topics_for_website(
+                    website,
+                    openai_key,
+                    supabase_url,
+                    supabase_key,
+                    encryption_key,  # Pass for Google Search API
+                    scan_data=existing_scan,
+                    search_limiter=search_limiter
+                )
+                if topics:
+                    self._log_info(f"Discovered {len(topics)} topics for {website.get('name')}")
+                return len(topics) if topics else 0
+            except Exception as e:
+                console.log(f"Discovery error for {website.get('name')}: {str(e)}")
+                return 0
+
     async def discover_topics_for_website(
         self,
         website: dict,
         api_key: str,
         supabase_url: str,
         supabase_key: str,
-        encryption_key: str = None
+        encryption_key: str = None,
+        scan_data: dict = None,
+        search_limiter: Optional[_AdaptiveLimiter] = None
     ) -> list:
-        """Discover multiple topics for a website using scan data, Google Search, and GPT-4o."""
+        """Discover multiple topics for a website using scan data, Google Search, and GPT-4o.
+
+        Callers that already hold the website's scan row pass it as scan_data to skip
+        the lookup, and batch runs pass their Google Search limiter as search_limiter.
+        """
 
         # Get scan data for context-aware discovery
-        scan_data = await self.get_website_scan(website.get("id"), supabase_url, supabase_key)
+        if scan_data is None:
+            scan_data = await self.get_website_scan(website.get("id"), supabase_url, supabase_key)
 
         all_topics = []
+        ai_topics = []
 
         # 1. Try Google Custom Search API if enabled and configured
         # Keys are stored as Cloudflare secrets (faster, no DB lookup needed)
-        google_api_key = getattr(self.env, 'GOOGLE_SEARCH_API_KEY', None)
-        google_cx_id = getattr(self.env, 'GOOGLE_SEARCH_CX_ID', None)
+        google_api_key = self._env("GOOGLE_SEARCH_API_KEY", None)
+        google_cx_id = self._env("GOOGLE_SEARCH_CX_ID", None)
 
         if website.get("google_search_enabled", True) and google_api_key and google_cx_id and scan_data:
-            console.log(f"Discovering topics from Google Search for {website.get('name')}")
+            self._log_info(f"Discovering topics from Google Search for {website.get('name')}")
             google_topics = await self.discover_topics_from_search(
-                website, scan_data, google_api_key, google_cx_id, supabase_url, supabase_key
+                website, scan_data, google_api_key, google_cx_id, supabase_url, supabase_key,
+                limiter=search_limiter
             )
             all_topics.extend(google_topics)
-            console.log(f"Found {len(google_topics)} topics from Google Search")
+            self._log_info(f"Found {len(google_topics)} topics from Google Search")
 
         # 2. Generate AI topics with enhanced context for SEO and GEO
         seasonal_themes = self.get_current_seasonal_themes()
         seasonal_hint = f"- Current Season Themes: {', '.join(seasonal_themes[:5])}" if seasonal_themes else ""
 
         if scan_data and scan_data.get("niche_description"):
+            themes = scan_data.get("content_themes") or []
+            main_keywords = scan_data.get("main_keywords") or []
+            headings = scan_data.get("headings") or []
             prompt = f"""Find 5 highly-targeted blog topics for this website optimized for both Google SEO and AI search engines (ChatGPT, Perplexity, Gemini).
 
 WEBSITE CONTEXT (from actual website scan):
 - Website Name: {website.get('name')}
 - Domain: {website.get('domain')}
 - Niche: {scan_data.get('niche_description', 'N/A')}
-- Main Themes: {', '.join(scan_data.get('content_themes', [])[:5])}
-- Key Topics Found: {', '.join(scan_data.get('main_keywords', [])[:15])}
-- Sample Headings: {', '.join(scan_data.get('headings', [])[:8])}
+- Main Themes: {', '.join(themes[:5])}
+- Key Topics Found: {', '.join(main_keywords[:15])}
+- Sample Headings: {', '.join(headings[:8])}
 {seasonal_hint}
 
 TOPIC REQUIREMENTS:
@@ -1013,17 +1652,7 @@ TOPIC REQUIREMENTS:
 
 Language: {website.get('language', 'en-US')}
 
-Return ONLY a JSON object (no markdown):
-{{"topics": [{{
-  "title": "How to [Action] for [Specific Outcome]",
-  "keywords": ["long-tail keyword 1", "keyword 2", "keyword 3"],
-  "category": "category_name",
-  "priority": 7,
-  "search_intent": "informational|commercial|transactional|navigational",
-  "timeliness": "evergreen|seasonal|news|trending",
-  "format_hint": "listicle|how_to_guide|deep_dive|comparison|case_study|qa_interview|news_commentary|ultimate_guide",
-  "trending_reason": "Why this topic is relevant now (or null if evergreen)"
-}}]}}"""
+{_DISCOVERY_TOPICS_FORMAT}"""
         else:
             # Fallback to basic prompt without scan data
             prompt = f"""Find 5 highly-targeted blog topics for a website about: {website.get('name')}
@@ -1037,32 +1666,14 @@ TOPIC REQUIREMENTS:
 3. Question-based or list-based titles (great for AI search engines)
 4. Consider seasonal relevance where appropriate
 
-Return ONLY a JSON object (no markdown):
-{{"topics": [{{
-  "title": "How to [Action] for [Specific Outcome]",
-  "keywords": ["long-tail keyword 1", "keyword 2", "keyword 3"],
-  "category": "category_name",
-  "priority": 7,
-  "search_intent": "informational|commercial|transactional|navigational",
-  "timeliness": "evergreen|seasonal|news|trending",
-  "format_hint": "listicle|how_to_guide|deep_dive|comparison|case_study|qa_interview|news_commentary|ultimate_guide",
-  "trending_reason": "Why this topic is relevant now (or null if evergreen)"
-}}]}}"""
+{_DISCOVERY_TOPICS_FORMAT}"""
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = _openai_headers(api_key)
 
-        body = json.dumps({
-            "model": "gpt-4o",
-            "messages": [
-                {"role": "system", "content": "You are a content strategist. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 1500,
-            "temperature": 0.8
-        })
+        body = _openai_chat_body(
+            "You are a content strategist. Return only valid JSON.",
+            prompt, 1500, 0.8
+        )
 
         try:
             response = await fetch(
@@ -1071,15 +1682,10 @@ Return ONLY a JSON object (no markdown):
             )
 
             if response.ok:
-                data = await self._parse_json(response)
-                content = data["choices"][0]["message"]["content"]
-                content = content.strip()
-                if content.startswith("```"):
-                    content = content.split("```")[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-
-                result = json.loads(content)
+                content = await _chat_completion_text(response)
+                content = _strip_code_fence(content)
+
+                result = _json_loads(content)
                 ai_topics = result.get("topics", [])
 
                 # Add discovery context, source, and enhanced metadata to AI topics
@@ -1113,32 +1719,37 @@ Return ONLY a JSON object (no markdown):
                             "search_intent": topic.get("search_intent")
                         }
 
-                # Save AI-generated topics
-                for topic in ai_topics:
-                    saved_topic = await self.save_generated_topic(
-                        website.get("id"), topic, supabase_url, supabase_key
-                    )
-                    if saved_topic:
-                        all_topics.append(saved_topic)
-
-                console.log(f"Generated {len(ai_topics)} AI topics for {website.get('name')}")
+                self._log_info(f"Generated {len(ai_topics)} AI topics for {website.get('name')}")
             else:
                 error_text = await response.text()
                 console.log(f"OpenAI error: {error_text}")
 
         except Exception as e:
             console.log(f"AI topic discovery failed: {str(e)}")
+            ai_topics = []
 
-        # 3. Save Google Search topics if we have any
-        for topic in all_topics:
-            if topic.get("source") == "google_search" and not topic.get("id"):
-                saved_topic = await self.save_generated_topic(
-                    website.get("id"), topic, supabase_url, supabase_key
-                )
-                if saved_topic:
-                    # Replace unsaved topic with saved one
-                    idx = all_topics.index(topic)
-                    all_topics[idx] = saved_topic
+        # 3. Save the AI topics on their own insert, so Google rows can't reject them
+        if ai_topics:
+            saved_topics = await self.save_generated_topics_bulk(
+                website.get("id"), ai_topics, supabase_url, supabase_key
+            )
+            all_topics.extend(saved_topics)
+
+        # 4. Save Google Search topics if we have any (each insert is independent)
+        unsaved_indexes = [
+            i for i, topic in enumerate(all_topics)
+            if topic.get("source") == "google_search" and not topic.get("id")
+        ]
+        saved_google = await asyncio.gather(*[
+            self.save_generated_topic(
+                website.get("id"), all_topics[i], supabase_url, supabase_key
+            )
+            for i in unsaved_indexes
+        ])
+        for i, saved_topic in zip(unsaved_indexes, saved_google):
+            if saved_topic:
+                # Replace unsaved topic with saved one
+                all_topics[i] = saved_topic
 
         return all_topics
 
@@ -1149,10 +1760,8 @@ Return ONLY a JSON object (no markdown):
         prompt = self.build_prompt(topic, website, content_format)
         system_prompt = website.get(f"system_prompt_{api_type}") or self.get_default_system_prompt(website)
 
-        if api_type == "openai":
-            content = await self.call_openai(prompt, system_prompt, api_key)
-        else:
-            content = await self.call_anthropic(prompt, system_prompt, api_key)
+        provider = api_type if api_type in _LLM_PROVIDERS else "claude"
+        content = await self._call_llm(provider, prompt, system_prompt, api_key)
 
         if not content:
             return None
@@ -1166,73 +1775,35 @@ Return ONLY a JSON object (no markdown):
 
         return article
 
-    async def call_openai(self, prompt: str, system_prompt: str, api_key: str) -> Optional[str]:
-        """Call OpenAI API directly via HTTP."""
+    async def _call_llm(self, provider: str, prompt: str, system_prompt: str, api_key: str) -> Optional[str]:
+        """Call an article generation API from _LLM_PROVIDERS directly via HTTP."""
+        config = _LLM_PROVIDERS[provider]
         try:
-            headers = {
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            }
-
-            body = json.dumps({
-                "model": "gpt-4o",
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": prompt}
-                ],
-                "max_tokens": 4000,
-                "temperature": 0.7
-            })
-
             response = await fetch(
-                "https://api.openai.com/v1/chat/completions",
-                self._make_options("POST", headers, body)
+                config["url"],
+                self._make_options(
+                    "POST", config["headers"](api_key), config["body"](system_prompt, prompt)
+                )
             )
 
             if response.ok:
-                data = await self._parse_json(response)
-                return data["choices"][0]["message"]["content"]
+                # Read only the completion text off the JS object (see _chat_completion_text)
+                return await config["extract"](response)
             else:
                 error = await response.text()
-                console.log(f"OpenAI error: {error}")
+                console.log(f"{config['label']} error: {error}")
                 return None
         except Exception as e:
-            console.log(f"OpenAI call failed: {str(e)}")
+            console.log(f"{config['label']} call failed: {str(e)}")
             return None
 
+    async def call_openai(self, prompt: str, system_prompt: str, api_key: str) -> Optional[str]:
+        """Call OpenAI API directly via HTTP."""
+        return await self._call_llm("openai", prompt, system_prompt, api_key)
+
     async def call_anthropic(self, prompt: str, system_prompt: str, api_key: str) -> Optional[str]:
         """Call Anthropic Claude API directly via HTTP."""
-        try:
-            headers = {
-                "x-api-key": api_key,
-                "anthropic-version": "2023-06-01",
-                "Content-Type": "application/json"
-            }
-
-            body = json.dumps({
-                "model": "claude-sonnet-4-6",
-                "max_tokens": 4000,
-                "system": system_prompt,
-                "messages": [
-                    {"role": "user", "content": prompt}
-                ]
-            })
-
-            response = await fetch(
-                "https://api.anthropic.com/v1/messages",
-                self._make_options("POST", headers, body)
-            )
-
-            if response.ok:
-                data = await self._parse_json(response)
-                return data["content"][0]["text"]
-            else:
-                error = await response.text()
-                console.log(f"Anthropic error: {error}")
-                return None
-        except Exception as e:
-            console.log(f"Anthropic call failed: {str(e)}")
-            return None
+        return await self._call_llm("claude", prompt, system_prompt, api_key)
 
     # =============================================
     # CONTENT FORMAT SELECTION & BUILDING
@@ -1265,7 +1836,7 @@ Return ONLY a JSON object (no markdown):
         selected_format = CONTENT_FORMATS[selected_key].copy()
         selected_format["key"] = selected_key
 
-        console.log(f"Selected content format: {selected_format['name']}")
+        self._log_info(f"Selected content format: {selected_format['name']}")
         return selected_format
 
     def _build_structure_instructions(self, content_format: dict, language: str) -> str:
@@ -1454,50 +2025,38 @@ Return ONLY a JSON object (no markdown):
         voice_style = website.get("voice_style", "conversational")
 
         # Build all the dynamic sections
-        structure_instructions = self._build_structure_instructions(
-            content_format,
-            website.get('language', 'en-US')
-        )
+        language = website.get('language', 'en-US')
+        structure_instructions = self._build_structure_instructions(content_format, language)
         heading_instructions = self._get_heading_style_instructions(
             content_format.get("heading_style", "descriptive"),
-            website.get('language', 'en-US')
+            language
         )
         tone_instructions = self._get_tone_instructions(content_format.get("tone", "conversational"), voice_style)
         genuineness_instructions = self._get_genuineness_instructions(website)
         geo_instructions = self._get_geo_instructions(topic)
 
-        return f"""Write a {content_format['name']} style blog article.
-
-TOPIC: {topic.get('title')}
-TARGET KEYWORDS: {keywords}
-LANGUAGE: {website.get('language', 'en-US')}
-CATEGORY: {topic.get('category', 'general')}
-FORMAT: {content_format['name']} - {content_format.get('description', '')}
-
-{structure_instructions}
-
-HEADING STYLE:
-{heading_instructions}
-
-TONE & VOICE:
-{tone_instructions}
-{genuineness_instructions}
-{geo_instructions}
-
-CRITICAL FORMATTING RULES:
-- Output ONLY the article content - no wrapper or meta text
-- Do NOT wrap in markdown code blocks (no ```)
-- Do NOT include <!DOCTYPE>, <html>, <head>, <body>, <meta>, or <title> tags
-- Do NOT start with "Here is the article" or any meta-commentary
-- Do NOT add HTML comments
-- Use semantic HTML tags: <h2>, <h3>, <p>, <ul>, <li>, <ol>, <div>, <strong>, <em>
-- Start DIRECTLY with the first section content
-
-BEGIN THE ARTICLE NOW:"""
+        return _ARTICLE_PROMPT_TEMPLATE.format_map({
+            "format_name": content_format['name'],
+            "title": topic.get('title'),
+            "keywords": keywords,
+            "language": language,
+            "category": topic.get('category', 'general'),
+            "format_description": content_format.get('description', ''),
+            "structure_instructions": structure_instructions,
+            "heading_instructions": heading_instructions,
+            "tone_instructions": tone_instructions,
+            "genuineness_instructions": genuineness_instructions,
+            "geo_instructions": geo_instructions,
+        })
 
     def get_default_system_prompt(self, website: dict) -> str:
         """Get default system prompt with genuineness instructions."""
         voice_style = website.get("voice_style", "conversational")
+        cache_key = (website.get('name', 'a professional website'), voice_style)
+        cached = _SYSTEM_PROMPT_CACHE.get(cache_key)
+        if cached is not None:
+            return cached
+
         voice_config = VOICE_STYLES.get(voice_style, VOICE_STYLES["conversational"])
 
         # Build personality based on voice style
@@ -1510,7 +2069,7 @@ BEGIN THE ARTICLE NOW:"""
         else:  # conversational
             personality = "You write naturally like a knowledgeable colleague sharing insights."
 
-        return f"""You are an expert content writer for {website.get('name', 'a professional website')}.
+        system_prompt = f"""You are an expert content writer for {website.get('name', 'a professional website')}.
 {personality}
 
 Your content philosophy:
@@ -1526,54 +2085,37 @@ Writing rules:
 - Never include document structure tags (html, head, body)
 - Never add meta-commentary about the article
 - Vary your sentence structure and paragraph lengths naturally"""
+        if len(_SYSTEM_PROMPT_CACHE) >= _SYSTEM_PROMPT_CACHE_MAX:
+            _SYSTEM_PROMPT_CACHE.clear()
+        _SYSTEM_PROMPT_CACHE[cache_key] = system_prompt
+        return system_prompt
 
     def clean_content(self, content: str, title: str) -> str:
         """Clean AI output: remove code blocks, document structure, meta-commentary."""
-        import re
-
         # 1. Remove markdown code blocks (```html ... ``` or ```json ... ```)
-        content = re.sub(r'```\w*\n?', '', content)
-        content = re.sub(r'```', '', content)
+        content = _CODE_FENCE_OPEN_RE.sub('', content)
+        content = content.replace('```', '')
 
         # 2. Remove full HTML document structure tags
-        content = re.sub(r'<!DOCTYPE[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<html[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'</html>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<head>.*?</head>', '', content, flags=re.IGNORECASE | re.DOTALL)
-        content = re.sub(r'<body[^>]*>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'</body>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<meta[^>]*/?>', '', content, flags=re.IGNORECASE)
-        content = re.sub(r'<title>.*?</title>', '', content, flags=re.IGNORECASE | re.DOTALL)
-        content = re.sub(r'<header>.*?</header>', '', content, flags=re.IGNORECASE | re.DOTALL)
+        content = _DOCUMENT_STRUCTURE_RE.sub('', content)
 
         # 3. Remove AI meta-commentary patterns
-        meta_patterns = [
-            r'^Here is the \d*\+? ?word .*?:?\s*\n+',
-            r'^Here\'s the .*? article.*?:?\s*\n+',
-            r'^Below is .*?:?\s*\n+',
-            r'^I\'ve written .*?:?\s*\n+',
-            r'^The following is .*?:?\s*\n+',
-            r'^This is .*? article.*?:?\s*\n+',
-            r'^\[.*?word.*?article.*?\]\s*\n+',
-        ]
-        for pattern in meta_patterns:
-            content = re.sub(pattern, '', content, flags=re.IGNORECASE | re.MULTILINE)
+        content = _META_COMMENTARY_RE.sub('', content)
 
         # 4. Remove HTML comments (internal linking suggestions, etc.)
-        content = re.sub(r'<!--.*?-->', '', content, flags=re.DOTALL)
+        content = _HTML_COMMENT_RE.sub('', content)
 
         # 5. Remove the title if it appears at the beginning (duplicate of h1)
         if title:
-            content = re.sub(rf'^#?\s*{re.escape(title)}\s*\n', '', content, flags=re.IGNORECASE)
+            content = _strip_leading_title(content, title)
 
         # 6. Convert markdown-style headers to HTML (if AI still uses markdown)
-        content = re.sub(r'^## (.+)$', r'<h2>\1</h2>', content, flags=re.MULTILINE)
-        content = re.sub(r'^### (.+)$', r'<h3>\1</h3>', content, flags=re.MULTILINE)
-        content = re.sub(r'^\* (.+)$', r'<li>\1</li>', content, flags=re.MULTILINE)
-        content = re.sub(r'^- (.+)$', r'<li>\1</li>', content, flags=re.MULTILINE)
+        content = _MD_H2_RE.sub(r'<h2>\1</h2>', content)
+        content = _MD_H3_RE.sub(r'<h3>\1</h3>', content)
+        content = _MD_BULLET_RE.sub(r'<li>\1</li>', content)
 
         # 7. Clean up excessive whitespace
-        content = re.sub(r'\n{3,}', '\n\n', content)
+        content = _BLANK_LINES_RE.sub('\n\n', content)
         content = content.strip()
 
         return content
@@ -1634,8 +2176,6 @@ Writing rules:
 
     def _extract_tldr(self, content: str, language: str = "en-US") -> str:
         """Extract TL;DR summary from content (40-80 words optimal for AI search)."""
-        import re
-
         # Pattern 1: Look for TL;DR in div with class
         tldr_div_match = re.search(
             r'<div[^>]*class=["\']tldr["\'][^>]*>.*?<strong>TL;DR:?</strong>\s*(.*?)</div>',
@@ -1683,7 +2223,6 @@ Writing rules:
 
     def _extract_faq_items(self, content: str, language: str = "en-US") -> list:
         """Extract FAQ Q&A pairs from content (3-5 items optimal for FAQPage schema)."""
-        import re
         faq_items = []
         seen_questions = set()
 
@@ -1750,7 +2289,6 @@ Writing rules:
 
     def _extract_statistics(self, content: str, language: str = "en-US") -> list:
         """Extract statistics with source attribution from content."""
-        import re
         statistics = []
         seen_stats = set()
 
@@ -1807,7 +2345,6 @@ Writing rules:
 
     def _extract_citations(self, content: str, language: str = "en-US") -> list:
         """Extract expert quotes and citations from content."""
-        import re
         citations = []
         seen_quotes = set()
 
@@ -2030,11 +2567,7 @@ Writing rules:
         - Any fetch error (fail silently - never break article generation)
         """
         try:
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}",
-                "Content-Type": "application/json"
-            }
+            headers = self._supabase_headers(supabase_key, write=True)
 
             # Fetch active partners ordered by priority
             response = await fetch(
@@ -2047,7 +2580,7 @@ Writing rules:
 
             if response.ok:
                 partners = await self._parse_json(response)
-                console.log(f"Fetched {len(partners)} active partners for backlinking")
+                self._log_info(f"Fetched {len(partners)} active partners for backlinking")
                 return partners
 
             # Table doesn't exist or other error - fail silently
@@ -2175,8 +2708,6 @@ Writing rules:
         if not backlinks:
             return content
 
-        import re
-
         # Split content by closing paragraph tags
         paragraphs = re.split(r'(</p>)', content)
 
@@ -2239,8 +2770,6 @@ Writing rules:
 
         Returns sentence with [LINK] placeholder for the actual link.
         """
-        import random
-
         partner_name = backlink.get("partner_name", "")
 
         # Templates by language
@@ -2280,45 +2809,53 @@ Writing rules:
         if not partner_ids:
             return
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json"
-        }
+        headers = self._supabase_headers(supabase_key, write=True)
+        now_iso = datetime.now().isoformat()
 
-        for partner_id in partner_ids:
-            if not partner_id:
-                continue
+        # Partners are independent rows, so their increments run concurrently
+        await asyncio.gather(*[
+            self._increment_partner_link_count(partner_id, headers, supabase_url, now_iso)
+            for partner_id in partner_ids
+            if partner_id
+        ])
 
-            try:
-                # Use RPC function if available, otherwise direct update
-                response = await fetch(
-                    f"{supabase_url}/rest/v1/rpc/increment_partner_link_count",
-                    self._make_options("POST", headers, json.dumps({"partner_id": partner_id}))
-                )
+    async def _increment_partner_link_count(
+        self,
+        partner_id: str,
+        headers: dict,
+        supabase_url: str,
+        now_iso: str
+    ):
+        """Increment one partner's total_links_generated; failures are logged, not raised."""
+        try:
+            # Use RPC function if available, otherwise direct update
+            response = await fetch(
+                f"{supabase_url}/rest/v1/rpc/increment_partner_link_count",
+                self._make_options("POST", headers, _json_dumps({"partner_id": partner_id}))
+            )
 
-                if not response.ok:
-                    # Fallback: direct update (less atomic but works)
-                    # First fetch current count
-                    get_response = await fetch(
-                        f"{supabase_url}/rest/v1/website_partners?id=eq.{partner_id}&select=total_links_generated",
-                        self._make_options("GET", headers)
-                    )
+            if not response.ok:
+                # Fallback: direct update (less atomic but works)
+                # First fetch current count
+                get_response = await fetch(
+                    f"{supabase_url}/rest/v1/website_partners?id=eq.{partner_id}&select=total_links_generated",
+                    self._make_options("GET", headers)
+                )
 
-                    if get_response.ok:
-                        data = await self._parse_json(get_response)
-                        if data:
-                            current_count = data[0].get("total_links_generated", 0)
-                            update_data = {
-                                "total_links_generated": current_count + 1,
-                                "last_linked_at": datetime.now().isoformat()
-                            }
-                            await fetch(
-                                f"{supabase_url}/rest/v1/website_partners?id=eq.{partner_id}",
-                                self._make_options("PATCH", headers, json.dumps(update_data))
-                            )
-            except Exception as e:
-                console.log(f"Failed to update partner stats for {partner_id}: {str(e)}")
+                if get_response.ok:
+                    data = await self._parse_json(get_response)
+                    if data:
+                        current_count = data[0].get("total_links_generated", 0)
+                        update_data = {
+                            "total_links_generated": current_count + 1,
+                            "last_linked_at": now_iso
+                        }
+                        await fetch(
+                            f"{supabase_url}/rest/v1/website_partners?id=eq.{partner_id}",
+                            self._make_options("PATCH", headers, _json_dumps(update_data))
+                        )
+        except Exception as e:
+            console.log(f"Failed to update partner stats for {partner_id}: {str(e)}")
 
     def parse_article(self, content: str, topic: dict, website: dict) -> dict:
         """Parse AI response into article structure with full GEO optimization.
@@ -2330,11 +2867,8 @@ Writing rules:
         - Internal link suggestions
         - Secondary keywords
         """
-        import re
-
         # Generate slug from topic title
-        slug = topic.get("title", "").lower()
-        slug = "".join(c if c.isalnum() or c == " " else "" for c in slug)
+        slug = _SLUG_STRIP_RE.sub("", topic.get("title", "").lower())
         slug = "-".join(slug.split())[:60]
 
         # ALWAYS use topic title - optimized, never extracted from AI content
@@ -2345,12 +2879,12 @@ Writing rules:
         cleaned_content = self.clean_content(content, title)
 
         # Generate excerpt from cleaned content (strip HTML tags for text)
-        text_content = re.sub(r'<[^>]+>', ' ', cleaned_content)
-        text_content = re.sub(r'\s+', ' ', text_content).strip()
+        text_content = _TAG_OR_WHITESPACE_RE.sub(' ', cleaned_content).strip()
         excerpt = text_content[:200] + "..." if len(text_content) > 200 else text_content
 
-        # Calculate word count and reading time from cleaned content
-        word_count = len(cleaned_content.split())
+        # Calculate word count and reading time from the tag-free text. Its whitespace
+        # is already collapsed to single spaces, so counting spaces counts the words.
+        word_count = text_content.count(' ') + 1 if text_content else 0
         read_time = max(1, word_count // 200)
 
         # Get language for GEO extraction
@@ -2412,13 +2946,17 @@ Writing rules:
         - Keywords: 15 points
         - GEO factors (AI search readiness): 25 points
         """
-        import re
         content = article.get("content", "")
         title = article.get("title", "")
         excerpt = article.get("excerpt", "")
         primary_keyword = article.get("primary_keyword", "")
         word_count = article.get("word_count", 0)
 
+        # Lowercased once; each is reused by several scoring checks below
+        content_lower = content.lower()
+        title_lower = title.lower()
+        keyword_lower = primary_keyword.lower() if primary_keyword else ""
+
         score = 0
         scoring_breakdown = {}
 
@@ -2435,8 +2973,8 @@ Writing rules:
                 title_score += 2
 
             # Keyword in title (front-loaded is better)
-            if primary_keyword and primary_keyword.lower() in title.lower():
-                keyword_pos = title.lower().find(primary_keyword.lower())
+            keyword_pos = title_lower.find(keyword_lower) if primary_keyword else -1
+            if keyword_pos != -1:
                 if keyword_pos < len(title) // 3:  # In first third
                     title_score += 8
                 else:
@@ -2444,7 +2982,7 @@ Writing rules:
 
             # Power words in title (engagement boosters)
             power_words = ["how", "why", "what", "best", "guide", "top", "ultimate", "essential", "complete"]
-            if any(word in title.lower() for word in power_words):
+            if any(word in title_lower for word in power_words):
                 title_score += 4
 
         scoring_breakdown["title"] = title_score
@@ -2461,9 +2999,14 @@ Writing rules:
         elif word_count >= 600:
             structure_score += 2
 
-        # Heading structure
-        h2_count = len(re.findall(r'<h2[^>]*>', content, re.IGNORECASE))
-        h3_count = len(re.findall(r'<h3[^>]*>', content, re.IGNORECASE))
+        # Heading structure (h2 and h3 counted in a single scan)
+        h2_count = 0
+        h3_count = 0
+        for match in _H2_H3_OPEN_RE.finditer(content):
+            if match.group(1) == "2":
+                h2_count += 1
+            else:
+                h3_count += 1
 
         if h2_count >= 3:
             structure_score += 5
@@ -2476,13 +3019,13 @@ Writing rules:
             structure_score += 2
 
         # Lists presence (good for readability and featured snippets)
-        has_ul = '<ul' in content.lower()
-        has_ol = '<ol' in content.lower()
+        has_ul = '<ul' in content_lower
+        has_ol = '<ol' in content_lower
         if has_ul or has_ol:
             structure_score += 4
 
         # Paragraph variety (not all same length)
-        paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', content, re.DOTALL | re.IGNORECASE)
+        paragraphs = _PARAGRAPH_RE.findall(content)
         if len(paragraphs) >= 5:
             structure_score += 4
         elif len(paragraphs) >= 3:
@@ -2506,7 +3049,7 @@ Writing rules:
                 meta_score += 2
 
             # Keyword in meta description
-            if primary_keyword and primary_keyword.lower() in meta_desc.lower():
+            if primary_keyword and keyword_lower in meta_desc.lower():
                 meta_score += 4
 
         # Has excerpt/summary
@@ -2521,8 +3064,6 @@ Writing rules:
 
         if primary_keyword and content:
             # Keyword density (optimal: 1-2%)
-            keyword_lower = primary_keyword.lower()
-            content_lower = content.lower()
             keyword_count = content_lower.count(keyword_lower)
             words_in_content = len(content.split())
 
@@ -2533,13 +3074,12 @@ Writing rules:
                 elif 0.2 <= density < 0.5 or 2.5 < density <= 4:
                     keyword_score += 4
 
-            # Keyword in first paragraph
-            first_para_match = re.search(r'<p[^>]*>(.*?)</p>', content, re.DOTALL | re.IGNORECASE)
-            if first_para_match and keyword_lower in first_para_match.group(1).lower():
+            # Keyword in first paragraph (already matched by the paragraph scan above)
+            if paragraphs and keyword_lower in paragraphs[0].lower():
                 keyword_score += 4
 
             # Keyword in headings
-            heading_text = " ".join(re.findall(r'<h[23][^>]*>(.*?)</h[23]>', content, re.IGNORECASE))
+            heading_text = " ".join(_H2_H3_TEXT_RE.findall(content))
             if keyword_lower in heading_text.lower():
                 keyword_score += 3
 
@@ -2587,13 +3127,13 @@ Writing rules:
         # Fallback: Check content patterns if no extracted GEO elements
         if geo_score < 10:
             # Check for FAQ section in content
-            has_faq_section = bool(re.search(r'<h[23][^>]*>[^<]*(?:FAQ|Frequently Asked|Questions|Veelgestelde vragen)[^<]*</h[23]>', content, re.IGNORECASE))
-            has_question_headings = len(re.findall(r'<h[23][^>]*>[^<]*\?</h[23]>', content)) >= 2
+            has_faq_section = bool(_FAQ_HEADING_RE.search(content))
+            has_question_headings = len(_QUESTION_HEADING_RE.findall(content)) >= 2
             if has_faq_section or has_question_headings:
                 geo_score += 3
 
             # Check for summary section
-            has_summary = bool(re.search(r'<h[23][^>]*>[^<]*(?:Summary|Key Takeaways|Conclusion|TL;DR|Samenvatting)[^<]*</h[23]>', content, re.IGNORECASE))
+            has_summary = bool(_SUMMARY_HEADING_RE.search(content))
             if has_summary:
                 geo_score += 2
 
@@ -2601,23 +3141,26 @@ Writing rules:
         score += geo_score
 
         # Generate keyword analysis
+        secondary_analysis = []
+        for kw in article.get("secondary_keywords", []):
+            kw_lower = kw.lower()
+            kw_count = content_lower.count(kw_lower)
+            secondary_analysis.append({
+                "keyword": kw,
+                "count": kw_count,
+                "density": round((kw_count / word_count * 100), 2) if word_count > 0 else 0,
+                "title_present": kw_lower in title_lower
+            })
+
         article["keyword_analysis"] = {
             "word_count": word_count,
             "primary_keyword": {
                 "keyword": primary_keyword,
                 "density": round(keyword_density, 2) if 'keyword_density' in dir() else 0,
-                "title_present": primary_keyword.lower() in title.lower() if primary_keyword else False,
-                "content_count": content.lower().count(primary_keyword.lower()) if primary_keyword else 0
+                "title_present": keyword_lower in title_lower if primary_keyword else False,
+                "content_count": content_lower.count(keyword_lower) if primary_keyword else 0
             },
-            "secondary_keywords": [
-                {
-                    "keyword": kw,
-                    "count": content.lower().count(kw.lower()),
-                    "density": round((content.lower().count(kw.lower()) / word_count * 100), 2) if word_count > 0 else 0,
-                    "title_present": kw.lower() in title.lower()
-                }
-                for kw in article.get("secondary_keywords", [])
-            ],
+            "secondary_keywords": secondary_analysis,
             "recommendations": []
         }
 
@@ -2633,8 +3176,8 @@ Writing rules:
         """Save article to target website's Supabase database.
 
         Handles schema differences by automatically removing missing columns and retrying.
+        Columns removed this way are remembered per target, so later saves skip them.
         """
-        import re
         now = datetime.now().isoformat()
 
         # Essential fields that must exist in target schema
@@ -2682,15 +3225,13 @@ Writing rules:
             "backlinks": article.get("backlinks", []),
         }
 
-        # Start with all fields
+        # Start with all fields, minus those this target is already known to lack
         data.update(optional_fields)
+        missing_columns = _MISSING_ARTICLE_COLUMNS.setdefault(target_url, set())
+        for column in missing_columns:
+            data.pop(column, None)
 
-        headers = {
-            "apikey": target_key,
-            "Authorization": f"Bearer {target_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
-        }
+        headers = self._supabase_headers(target_key, write=True, prefer="return=representation")
 
         # Retry loop - removes missing columns and retries (max 5 retries)
         # Also handles duplicate slugs by appending a unique suffix
@@ -2700,7 +3241,7 @@ Writing rules:
             try:
                 response = await fetch(
                     f"{target_url}/rest/v1/blog_articles",
-                    self._make_options("POST", headers, json.dumps(data))
+                    self._make_options("POST", headers, _json_dumps(data))
                 )
 
                 if response.ok:
@@ -2711,12 +3252,13 @@ Writing rules:
                     # Check if error is about missing column (PGRST204)
                     if "PGRST204" in error_text and "column" in error_text:
                         # Extract missing column name from error
-                        match = re.search(r"'(\w+)' column", error_text)
+                        match = _MISSING_COLUMN_RE.search(error_text)
                         if match:
                             missing_col = match.group(1)
                             if missing_col in data and missing_col not in ["title", "slug", "content", "status"]:
-                                console.log(f"Removing missing column '{missing_col}' and retrying...")
+                                self._log_info(f"Removing missing column '{missing_col}' and retrying...")
                                 del data[missing_col]
+                                missing_columns.add(missing_col)
                                 continue
 
                     # Check if error is a duplicate slug (23505 unique constraint)
@@ -2725,7 +3267,7 @@ Writing rules:
                         timestamp_suffix = datetime.now().strftime("%Y%m%d%H%M")
                         new_slug = f"{original_slug[:47]}-{timestamp_suffix}"
                         data["slug"] = new_slug
-                        console.log(f"Duplicate slug detected, retrying with: {new_slug}")
+                        self._log_info(f"Duplicate slug detected, retrying with: {new_slug}")
                         continue
 
                     console.log(f"Save article error: {error_text}")
@@ -2737,25 +3279,27 @@ Writing rules:
         console.log("Save article failed: max retries exceeded")
         return False
 
-    async def create_generation_log(self, website_id: str, topic_id: str, supabase_url: str, supabase_key: str) -> Optional[str]:
+    async def create_generation_log(
+        self,
+        website_id: str,
+        topic_id: str,
+        supabase_url: str,
+        supabase_key: str,
+        now_iso: str = None
+    ) -> Optional[str]:
         """Create a generation log entry."""
         data = {
             "website_id": website_id,
             "topic_id": topic_id,
             "status": "generating",
-            "started_at": datetime.now().isoformat()
+            "started_at": now_iso or datetime.now().isoformat()
         }
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
-        }
+        headers = self._supabase_headers(supabase_key, write=True, prefer="return=representation")
 
         response = await fetch(
             f"{supabase_url}/rest/v1/generation_logs",
-            self._make_options("POST", headers, json.dumps(data))
+            self._make_options("POST", headers, _json_dumps(data))
         )
 
         if response.ok:
@@ -2763,71 +3307,91 @@ Writing rules:
             return result[0].get("id") if result else None
         return None
 
-    async def update_generation_log(
+    def _generation_log_update(
         self,
-        log_id: str,
         status: str,
         error_message: Optional[str],
-        supabase_url: str,
-        supabase_key: str,
+        now_iso: str = None,
         **kwargs
-    ):
-        """Update a generation log entry."""
+    ) -> dict:
+        """Build the generation_logs PATCH body."""
         data = {
             "status": status,
-            "completed_at": datetime.now().isoformat(),
+            "completed_at": now_iso or datetime.now().isoformat(),
             **kwargs
         }
         if error_message:
             data["error_message"] = error_message
+        return data
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json"
-        }
+    async def update_generation_log(
+        self,
+        log_id: str,
+        status: str,
+        error_message: Optional[str],
+        supabase_url: str,
+        supabase_key: str,
+        now_iso: str = None,
+        **kwargs
+    ):
+        """Update a generation log entry."""
+        data = self._generation_log_update(status, error_message, now_iso, **kwargs)
+
+        headers = self._supabase_headers(supabase_key, write=True)
 
         await fetch(
             f"{supabase_url}/rest/v1/generation_logs?id=eq.{log_id}",
-            self._make_options("PATCH", headers, json.dumps(data))
+            self._make_options("PATCH", headers, _json_dumps(data))
         )
 
     async def mark_topic_used(self, topic_id: str, website: dict, supabase_url: str, supabase_key: str):
         """Mark a topic as used with times_used increment."""
         max_uses = website.get("max_topic_uses", 1)
 
-        # First get current times_used
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
+        headers = self._supabase_headers(supabase_key, write=True)
 
+        # Single atomic UPDATE (see migrations/006_increment_topic_usage.sql)
         response = await fetch(
+            f"{supabase_url}/rest/v1/rpc/increment_topic_usage",
+            self._make_options("POST", headers, _json_dumps({
+                "p_topic_id": topic_id,
+                "p_max_uses": max_uses
+            }))
+        )
+
+        if response.ok:
+            return
+
+        # Fallback: direct update (less atomic but works without migration 006)
+        error_text = await response.text()
+        console.log(f"increment_topic_usage failed for {topic_id}, using direct update: {error_text}")
+
+        # First get current times_used
+        get_response = await fetch(
             f"{supabase_url}/rest/v1/topics?id=eq.{topic_id}&select=times_used",
             self._make_options("GET", headers)
         )
 
         times_used = 0
-        if response.ok:
-            data = await self._parse_json(response)
+        if get_response.ok:
+            data = await self._parse_json(get_response)
             if data and len(data) > 0:
-                times_used = dict(data[0]).get("times_used", 0)
+                times_used = dict(data[0]).get("times_used", 0) or 0
 
         new_times_used = times_used + 1
-        is_used = new_times_used >= max_uses
-
-        data = {
+        update_data = {
             "times_used": new_times_used,
-            "is_used": is_used,
+            "is_used": new_times_used >= max_uses,
             "used_at": datetime.now().isoformat()
         }
 
-        headers["Content-Type"] = "application/json"
-
-        await fetch(
+        patch_response = await fetch(
             f"{supabase_url}/rest/v1/topics?id=eq.{topic_id}",
-            self._make_options("PATCH", headers, json.dumps(data))
+            self._make_options("PATCH", headers, _json_dumps(update_data))
         )
+        if not patch_response.ok:
+            error_text = await patch_response.text()
+            console.log(f"Failed to mark topic {topic_id} as used: {error_text}")
 
     def calculate_next_schedule(self, website: dict) -> datetime:
         """Calculate next posting time with time variation support.
@@ -2915,7 +3479,27 @@ Writing rules:
         api_used: str = None
     ):
         """Update website schedule after generation with time variation, format tracking, and API rotation."""
-        now = datetime.now()
+        data = self._website_schedule_update(days, website, content_format, api_used)
+
+        headers = self._supabase_headers(supabase_key, write=True)
+
+        await fetch(
+            f"{supabase_url}/rest/v1/websites?id=eq.{website_id}",
+            self._make_options("PATCH", headers, _json_dumps(data))
+        )
+
+        self._log_info(f"Next generation scheduled for: {data['next_scheduled_at']}")
+
+    def _website_schedule_update(
+        self,
+        days: int,
+        website: dict = None,
+        content_format: str = None,
+        api_used: str = None,
+        now: datetime = None
+    ) -> dict:
+        """Build the websites PATCH body for the next scheduled generation."""
+        now = now or datetime.now()
 
         # Calculate next schedule with variation if website config provided
         if website:
@@ -2948,18 +3532,76 @@ Writing rules:
             if api_used:
                 data["last_api_used"] = api_used
 
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json"
-        }
+        return data
 
-        await fetch(
-            f"{supabase_url}/rest/v1/websites?id=eq.{website_id}",
-            self._make_options("PATCH", headers, json.dumps(data))
+    async def finalize_generation(
+        self,
+        log_id: Optional[str],
+        topic_id: str,
+        website: dict,
+        article: dict,
+        api_used: str,
+        supabase_url: str,
+        supabase_key: str
+    ):
+        """Record a successful generation (log, topic usage, schedule) with a single RPC.
+
+        Falls back to the individual updates if the finalize_generation function
+        has not been installed (migrations/007_finalize_generation.sql).
+        """
+        # One timestamp for the whole finalization (log completion and schedule)
+        now = datetime.now()
+
+        log_data = self._generation_log_update(
+            "success", None, now.isoformat(),
+            article_title=article.get("title"),
+            article_slug=article.get("slug"),
+            api_used=api_used,
+            seo_score=article.get("seo_score", 0)
+        )
+        schedule_data = self._website_schedule_update(
+            website.get("days_between_posts", 3),
+            website=website,
+            content_format=article.get("content_format"),
+            api_used=api_used,
+            now=now
+        )
+
+        headers = self._supabase_headers(supabase_key, write=True)
+
+        response = await fetch(
+            f"{supabase_url}/rest/v1/rpc/finalize_generation",
+            self._make_options("POST", headers, _json_dumps({
+                "p_log_id": log_id,
+                "p_log": log_data,
+                "p_topic_id": topic_id,
+                "p_max_uses": website.get("max_topic_uses", 1),
+                "p_website_id": website.get("id"),
+                "p_schedule": schedule_data
+            }))
         )
 
-        console.log(f"Next generation scheduled for: {next_scheduled.isoformat()}")
+        if response.ok:
+            self._log_info(f"Next generation scheduled for: {schedule_data['next_scheduled_at']}")
+            return
+
+        error_text = await response.text()
+        console.log(f"finalize_generation RPC failed, using separate updates: {error_text}")
+
+        await self.update_generation_log(
+            log_id, "success", None, supabase_url, supabase_key,
+            now_iso=log_data["completed_at"],
+            article_title=log_data["article_title"],
+            article_slug=log_data["article_slug"],
+            api_used=api_used,
+            seo_score=log_data["seo_score"]
+        )
+        await self.mark_topic_used(topic_id, website, supabase_url, supabase_key)
+        await fetch(
+            f"{supabase_url}/rest/v1/websites?id=eq.{website.get('id')}",
+            self._make_options("PATCH", headers, _json_dumps(schedule_data))
+        )
+        self._log_info(f"Next generation scheduled for: {schedule_data['next_scheduled_at']}")
 
     # =============================================
     # WEBSITE SCANNING FUNCTIONS
@@ -2968,63 +3610,36 @@ Writing rules:
     async def scan_all_websites(self) -> dict:
         """Scan all active websites to extract content themes and keywords."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables"}
 
             # Get all active websites with auto_scan_enabled
-            url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&auto_scan_enabled=eq.true&select=*"
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            }
+            url = f"{supabase_url}/rest/v1/websites?is_active=eq.true&auto_scan_enabled=eq.true&{_SCAN_CONTEXT_SELECT}"
+            headers = self._supabase_headers(supabase_key)
 
             response = await fetch(url, self._make_options("GET", headers))
 
             if not response.ok:
                 return {"error": "Failed to fetch websites"}
 
-            websites = list(await self._parse_json(response))
-            console.log(f"Scanning {len(websites)} websites")
-            scanned = 0
-
-            for website in websites:
-                try:
-                    # Check if scan is needed (based on scan_frequency_days)
-                    existing_scan = await self.get_website_scan(
-                        website.get("id"), supabase_url, supabase_key
-                    )
-
-                    if existing_scan:
-                        last_scanned = existing_scan.get("last_scanned_at")
-                        if last_scanned:
-                            from datetime import datetime
-                            try:
-                                last_scan_date = datetime.fromisoformat(last_scanned.replace('Z', '+00:00'))
-                                days_since = (datetime.now(last_scan_date.tzinfo) - last_scan_date).days
-                                scan_frequency = website.get("scan_frequency_days", 7)
-                                if days_since < scan_frequency:
-                                    console.log(f"Skipping {website.get('name')} - scanned {days_since} days ago")
-                                    continue
-                            except:
-                                pass  # If date parsing fails, proceed with scan
-
-                    # Get API keys for AI analysis
-                    api_keys = await self.get_api_keys(website.get("id"), supabase_url, supabase_key)
-                    openai_key = None
-                    if api_keys and api_keys.get("openai_api_key_encrypted"):
-                        openai_key = await self._decrypt(api_keys.get("openai_api_key_encrypted"), encryption_key)
+            websites = await self._parse_json(response) or []
+            self._log_info(f"Scanning {len(websites)} websites")
 
-                    success = await self.scan_website(
-                        website, openai_key, supabase_url, supabase_key
-                    )
-                    if success:
-                        scanned += 1
-                except Exception as e:
-                    console.log(f"Error scanning {website.get('name')}: {str(e)}")
+            semaphore = asyncio.Semaphore(MAX_CONCURRENT_WEBSITES)
+            # Adaptive concurrency for the OpenAI analysis calls, scoped to this run
+            analysis_limiter = _AdaptiveLimiter(initial=4)
+            results = await asyncio.gather(*[
+                self._scan_website_guarded(
+                    semaphore, website, supabase_url, supabase_key, encryption_key,
+                    analysis_limiter=analysis_limiter
+                )
+                for website in websites
+            ])
+            scanned = sum(1 for success in results if success)
 
             return {"message": f"Scanned {scanned} websites", "scanned": scanned}
 
@@ -3032,33 +3647,78 @@ Writing rules:
             console.log(f"Scan error: {str(e)}")
             return {"error": str(e)}
 
+    async def _scan_website_guarded(
+        self,
+        semaphore: asyncio.Semaphore,
+        website: dict,
+        supabase_url: str,
+        supabase_key: str,
+        encryption_key: str,
+        analysis_limiter: Optional[_AdaptiveLimiter] = None
+    ) -> bool:
+        """Scan one website under the concurrency limit if its last scan is stale."""
+        async with semaphore:
+            try:
+                has_keys, api_keys = self._pop_embedded(website, "api_keys")
+                has_scan, existing_scan = self._pop_embedded(website, "website_scans")
+
+                # Check if scan is needed (based on scan_frequency_days)
+                if not has_scan:
+                    existing_scan = await self.get_website_scan(
+                        website.get("id"), supabase_url, supabase_key
+                    )
+
+                if existing_scan:
+                    last_scanned = existing_scan.get("last_scanned_at")
+                    if last_scanned:
+                        try:
+                            last_scan_date = datetime.fromisoformat(last_scanned.replace('Z', '+00:00'))
+                            days_since = (datetime.now(last_scan_date.tzinfo) - last_scan_date).days
+                            scan_frequency = website.get("scan_frequency_days", 7)
+                            if days_since < scan_frequency:
+                                self._log_info(f"Skipping {website.get('name')} - scanned {days_since} days ago")
+                                return False
+                        except:
+                            pass  # If date parsing fails, proceed with scan
+
+                # Get API keys for AI analysis
+                if not has_keys:
+                    api_keys = await self.get_api_keys(website.get("id"), supabase_url, supabase_key)
+                openai_key = None
+                if api_keys and api_keys.get("openai_api_key_encrypted"):
+                    openai_key = await self._decrypt(api_keys.get("openai_api_key_encrypted"), encryption_key)
+
+                return await self.scan_website(
+                    website, openai_key, supabase_url, supabase_key, limiter=analysis_limiter
+                )
+            except Exception as e:
+                console.log(f"Error scanning {website.get('name')}: {str(e)}")
+                return False
+
     async def scan_single_website(self, website_id: str) -> dict:
         """Scan a single website by ID (for onboarding flow)."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables", "success": False}
 
             # Fetch website by ID
             url = f"{supabase_url}/rest/v1/websites?id=eq.{website_id}&select=*"
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            }
+            headers = self._supabase_headers(supabase_key)
 
             response = await fetch(url, self._make_options("GET", headers))
             if not response.ok:
                 return {"error": "Failed to fetch website", "success": False}
 
-            websites = list(await self._parse_json(response))
+            websites = await self._parse_json(response) or []
             if not websites:
                 return {"error": "Website not found", "success": False}
 
-            website = dict(websites[0])
-            console.log(f"Single website scan: {website.get('name')}")
+            website = websites[0]
+            self._log_info(f"Single website scan: {website.get('name')}")
 
             # Get API keys for AI analysis
             api_keys = await self.get_api_keys(website_id, supabase_url, supabase_key)
@@ -3068,7 +3728,7 @@ Writing rules:
 
             # Fallback to platform key
             if not openai_key:
-                openai_key = getattr(self.env, "PLATFORM_OPENAI_KEY", None)
+                openai_key = self._env("PLATFORM_OPENAI_KEY", None)
 
             success = await self.scan_website(website, openai_key, supabase_url, supabase_key)
 
@@ -3090,10 +3750,8 @@ Writing rules:
 
     async def scan_preview(self, domain: str) -> dict:
         """Preview scan - analyzes a domain without storing results (for onboarding preview)."""
-        import re
-
         try:
-            console.log(f"Preview scanning domain: {domain}")
+            self._log_info(f"Preview scanning domain: {domain}")
 
             # Clean domain
             domain = domain.lower().strip()
@@ -3102,16 +3760,16 @@ Writing rules:
             domain = domain.rstrip('/')
 
             # Get platform OpenAI key
-            openai_key = getattr(self.env, "PLATFORM_OPENAI_KEY", None)
+            openai_key = self._env("PLATFORM_OPENAI_KEY", None)
 
             # Fetch homepage (with 10s timeout)
             homepage_url = f"https://{domain}"
-            console.log(f"[1/4] Fetching homepage: {homepage_url}")
+            self._log_info(f"[1/4] Fetching homepage: {homepage_url}")
             homepage_html = await self.fetch_page_content(homepage_url, timeout_ms=10000)
 
             if not homepage_html:
                 # Try www variant
-                console.log(f"Homepage failed, trying www.{domain}")
+                self._log_info(f"Homepage failed, trying www.{domain}")
                 homepage_url = f"https://www.{domain}"
                 homepage_html = await self.fetch_page_content(homepage_url, timeout_ms=10000)
 
@@ -3122,7 +3780,7 @@ Writing rules:
                     "error": f"Failed to fetch homepage (tried with and without www)"
                 }
 
-            console.log(f"[2/4] Extracting metadata from homepage")
+            self._log_info(f"[2/4] Extracting metadata from homepage")
             # Extract metadata from homepage
             homepage_data = self.extract_page_metadata(homepage_html, homepage_url)
 
@@ -3131,15 +3789,23 @@ Writing rules:
             pages_data = [homepage_data]
 
             max_pages = min(len(nav_links), 6)
-            console.log(f"[3/4] Scanning {max_pages} navigation pages")
-            for i, link in enumerate(nav_links[:6]):
+            self._log_info(f"[3/4] Scanning {max_pages} navigation pages")
+            # Fetch the pages concurrently (shorter timeout per page to keep total time
+            # reasonable), then process them in link order
+            page_links = nav_links[:6]
+            page_htmls = await asyncio.gather(*[
+                self.fetch_page_content(link["url"], timeout_ms=6000)
+                for link in page_links
+            ], return_exceptions=True)
+
+            for link, page_html in zip(page_links, page_htmls):
                 try:
-                    # Shorter timeout per page to keep total time reasonable
-                    page_html = await self.fetch_page_content(link["url"], timeout_ms=6000)
+                    if isinstance(page_html, Exception):
+                        raise page_html
                     if page_html:
                         page_data = self.extract_page_metadata(page_html, link["url"])
                         pages_data.append(page_data)
-                        console.log(f"  ✓ {link['text']}: {link['url']}")
+                        self._log_info(f"  ✓ {link['text']}: {link['url']}")
                 except:
                     console.log(f"  ✗ Failed: {link['url']}")
 
@@ -3163,16 +3829,16 @@ Writing rules:
             content_themes = []
 
             if openai_key and (all_keywords or all_headings or all_titles):
-                console.log(f"[4/4] Analyzing content with AI...")
+                self._log_info(f"[4/4] Analyzing content with AI...")
                 ai_analysis = await self.analyze_content_with_ai_preview(
                     domain, all_titles, all_headings, all_keywords, openai_key
                 )
                 if ai_analysis:
                     niche_description = ai_analysis.get("niche_description")
                     content_themes = ai_analysis.get("content_themes", [])
-                    console.log(f"  - Niche identified: {niche_description[:50]}..." if niche_description else "  - No niche identified")
+                    self._log_info(f"  - Niche identified: {niche_description[:50]}..." if niche_description else "  - No niche identified")
             else:
-                console.log(f"[4/4] Skipping AI analysis (no API key or no content)")
+                self._log_info(f"[4/4] Skipping AI analysis (no API key or no content)")
 
             return {
                 "success": True,
@@ -3217,30 +3883,17 @@ Return ONLY valid JSON:
 
             response = await fetch(
                 "https://api.openai.com/v1/chat/completions",
-                self._make_options("POST", {
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json"
-                }, json.dumps({
-                    "model": "gpt-4o-mini",
-                    "messages": [
-                        {"role": "system", "content": "You analyze websites and identify their niche. Return only JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 300,
-                    "temperature": 0.3
-                }))
+                self._make_options("POST", _openai_headers(api_key), _openai_chat_body(
+                    "You analyze websites and identify their niche. Return only JSON.",
+                    prompt, 300, 0.3, model="gpt-4o-mini"
+                ))
             )
 
             if response.ok:
-                data = await self._parse_json(response)
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+                content = await _chat_completion_text(response)
                 # Parse JSON from response
-                content = content.strip()
-                if content.startswith("```"):
-                    content = content.split("```")[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                return json.loads(content)
+                content = _strip_code_fence(content)
+                return _json_loads(content)
         except Exception as e:
             console.log(f"AI preview analysis error: {str(e)}")
 
@@ -3249,30 +3902,27 @@ Return ONLY valid JSON:
     async def discover_for_single_website(self, website_id: str, count: int = 10) -> dict:
         """Discover topics for a single website (for onboarding flow)."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables", "success": False, "topics": []}
 
             # Fetch website by ID
             url = f"{supabase_url}/rest/v1/websites?id=eq.{website_id}&select=*"
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            }
+            headers = self._supabase_headers(supabase_key)
 
             response = await fetch(url, self._make_options("GET", headers))
             if not response.ok:
                 return {"error": "Failed to fetch website", "success": False, "topics": []}
 
-            websites = list(await self._parse_json(response))
+            websites = await self._parse_json(response) or []
             if not websites:
                 return {"error": "Website not found", "success": False, "topics": []}
 
-            website = dict(websites[0])
-            console.log(f"Discovering {count} topics for: {website.get('name')}")
+            website = websites[0]
+            self._log_info(f"Discovering {count} topics for: {website.get('name')}")
 
             # Get API keys
             api_keys = await self.get_api_keys(website_id, supabase_url, supabase_key)
@@ -3282,7 +3932,7 @@ Return ONLY valid JSON:
 
             # Fallback to platform key
             if not openai_key:
-                openai_key = getattr(self.env, "PLATFORM_OPENAI_KEY", None)
+                openai_key = self._env("PLATFORM_OPENAI_KEY", None)
 
             if not openai_key:
                 return {"error": "No OpenAI API key available", "success": False, "topics": []}
@@ -3290,11 +3940,13 @@ Return ONLY valid JSON:
             # Ensure website is scanned first
             existing_scan = await self.get_website_scan(website_id, supabase_url, supabase_key)
             if not existing_scan or existing_scan.get("scan_status") != "completed":
-                console.log(f"Scanning {website.get('name')} before topic discovery...")
+                self._log_info(f"Scanning {website.get('name')} before topic discovery...")
                 await self.scan_website(website, openai_key, supabase_url, supabase_key)
+                existing_scan = await self.get_website_scan(website_id, supabase_url, supabase_key)
 
             # Discover topics (call multiple times for larger counts)
             all_topics = []
+            seen_titles = set()
             batches_needed = (count + 4) // 5  # Each call returns ~5 topics
             max_batches = min(batches_needed, 10)  # Cap at 10 batches = 50 topics
 
@@ -3303,14 +3955,15 @@ Return ONLY valid JSON:
                     break
 
                 topics = await self.discover_topics_for_website(
-                    website, openai_key, supabase_url, supabase_key, encryption_key
+                    website, openai_key, supabase_url, supabase_key, encryption_key,
+                    scan_data=existing_scan
                 )
                 if topics:
-                    # Filter duplicates
-                    existing_titles = {t.get("title", "").lower() for t in all_topics}
-                    new_topics = [t for t in topics if t.get("title", "").lower() not in existing_titles]
+                    # Filter duplicates of earlier batches
+                    new_topics = [t for t in topics if t.get("title", "").lower() not in seen_titles]
+                    seen_titles.update(t.get("title", "").lower() for t in new_topics)
                     all_topics.extend(new_topics)
-                    console.log(f"Batch {i+1}: discovered {len(new_topics)} new topics")
+                    self._log_info(f"Batch {i+1}: discovered {len(new_topics)} new topics")
 
             # Trim to requested count
             all_topics = all_topics[:count]
@@ -3330,30 +3983,27 @@ Return ONLY valid JSON:
     async def generate_for_single_website(self, website_id: str) -> dict:
         """Generate content for a single website (for onboarding flow)."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables", "success": False}
 
-            # Fetch website by ID
-            url = f"{supabase_url}/rest/v1/websites?id=eq.{website_id}&select=*"
-            headers = {
-                "apikey": supabase_key,
-                "Authorization": f"Bearer {supabase_key}"
-            }
+            # Fetch website by ID (with api keys and next topic, as for cron runs)
+            url = f"{supabase_url}/rest/v1/websites?id=eq.{website_id}&{_GENERATION_SELECT}"
+            headers = self._supabase_headers(supabase_key)
 
             response = await fetch(url, self._make_options("GET", headers))
             if not response.ok:
                 return {"error": "Failed to fetch website", "success": False}
 
-            websites = list(await self._parse_json(response))
+            websites = await self._parse_json(response) or []
             if not websites:
                 return {"error": "Website not found", "success": False}
 
-            website = dict(websites[0])
-            console.log(f"Generating content for: {website.get('name')}")
+            website = websites[0]
+            self._log_info(f"Generating content for: {website.get('name')}")
 
             success = await self.process_website(website, supabase_url, supabase_key, encryption_key)
 
@@ -3373,21 +4023,21 @@ Return ONLY valid JSON:
     async def analyze_text_content(self, website_id: str, pages: list) -> dict:
         """Analyze manually pasted page text and save as scan results."""
         try:
-            supabase_url = getattr(self.env, "CENTRAL_SUPABASE_URL", None)
-            supabase_key = getattr(self.env, "CENTRAL_SUPABASE_SERVICE_KEY", None)
-            encryption_key = getattr(self.env, "ENCRYPTION_KEY", None)
+            supabase_url = self._env("CENTRAL_SUPABASE_URL", None)
+            supabase_key = self._env("CENTRAL_SUPABASE_SERVICE_KEY", None)
+            encryption_key = self._env("ENCRYPTION_KEY", None)
 
             if not all([supabase_url, supabase_key, encryption_key]):
                 return {"error": "Missing environment variables", "success": False}
 
             # Get website details
             url = f"{supabase_url}/rest/v1/websites?id=eq.{website_id}&select=*"
-            headers = {"apikey": supabase_key, "Authorization": f"Bearer {supabase_key}"}
+            headers = self._supabase_headers(supabase_key)
             response = await fetch(url, self._make_options("GET", headers))
-            websites = list(await self._parse_json(response))
+            websites = await self._parse_json(response) or []
             if not websites:
                 return {"error": "Website not found", "success": False}
-            website = dict(websites[0])
+            website = websites[0]
 
             # Get OpenAI key
             api_keys = await self.get_api_keys(website_id, supabase_url, supabase_key)
@@ -3395,7 +4045,7 @@ Return ONLY valid JSON:
             if api_keys and api_keys.get("openai_api_key_encrypted"):
                 openai_key = await self._decrypt(api_keys.get("openai_api_key_encrypted"), encryption_key)
             if not openai_key:
-                openai_key = getattr(self.env, "PLATFORM_OPENAI_KEY", None)
+                openai_key = self._env("PLATFORM_OPENAI_KEY", None)
 
             await self.update_scan_status(website_id, "scanning", supabase_url, supabase_key)
 
@@ -3434,27 +4084,17 @@ Return ONLY a JSON object (no markdown):
 
             ai_result = None
             if openai_key:
-                ai_headers = {"Authorization": f"Bearer {openai_key}", "Content-Type": "application/json"}
-                body = json.dumps({
-                    "model": "gpt-4o",
-                    "messages": [
-                        {"role": "system", "content": "You are an SEO analyst. Analyze website content and identify its niche accurately. Return only valid JSON."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    "max_tokens": 800,
-                    "temperature": 0.3
-                })
+                ai_headers = _openai_headers(openai_key)
+                body = _openai_chat_body(
+                    "You are an SEO analyst. Analyze website content and identify its niche accurately. Return only valid JSON.",
+                    prompt, 800, 0.3
+                )
                 try:
                     resp = await fetch("https://api.openai.com/v1/chat/completions",
                                        self._make_options("POST", ai_headers, body))
                     if resp.ok:
-                        data = await self._parse_json(resp)
-                        content = data["choices"][0]["message"]["content"].strip()
-                        if content.startswith("```"):
-                            content = content.split("```")[1]
-                            if content.startswith("json"):
-                                content = content[4:]
-                        ai_result = json.loads(content)
+                        content = _strip_code_fence(await _chat_completion_text(resp))
+                        ai_result = _json_loads(content)
                 except Exception as e:
                     console.log(f"AI analysis failed: {str(e)}")
 
@@ -3470,7 +4110,7 @@ Return ONLY a JSON object (no markdown):
             }
 
             await self.save_scan_results(website_id, scan_data, supabase_url, supabase_key)
-            console.log(f"Text analysis completed for {website.get('domain')}")
+            self._log_info(f"Text analysis completed for {website.get('domain')}")
             return {"success": True, "data": scan_data}
 
         except Exception as e:
@@ -3485,14 +4125,13 @@ Return ONLY a JSON object (no markdown):
         website: dict,
         openai_key: str,
         supabase_url: str,
-        supabase_key: str
+        supabase_key: str,
+        limiter: Optional[_AdaptiveLimiter] = None
     ) -> bool:
         """Scan a single website to extract content themes and keywords."""
-        import re
-
         website_id = website.get("id")
         domain = website.get("domain")
-        console.log(f"Scanning website: {domain}")
+        self._log_info(f"Scanning website: {domain}")
 
         # Update scan status to 'scanning'
         await self.update_scan_status(website_id, "scanning", supabase_url, supabase_key)
@@ -3506,7 +4145,7 @@ Return ONLY a JSON object (no markdown):
 
             if not homepage_html:
                 # Try www. variant as fallback
-                console.log(f"Homepage failed, trying www.{domain}")
+                self._log_info(f"Homepage failed, trying www.{domain}")
                 homepage_url = f"https://www.{domain}"
                 homepage_html = await self.fetch_page_content(homepage_url, timeout_ms=8000)
 
@@ -3522,27 +4161,36 @@ Return ONLY a JSON object (no markdown):
 
             # Find navigation links to scan more pages
             nav_links = self.identify_navigation_links(homepage_html, domain)
-            console.log(f"Found {len(nav_links)} navigation links")
+            self._log_info(f"Found {len(nav_links)} navigation links")
 
-            # Scan additional pages (limit to 5)
-            all_headings = list(homepage_data.get("headings", []))
-            all_keywords = list(homepage_data.get("keywords", []))
+            # Scan additional pages (limit to 5). Headings and keywords are kept in
+            # dicts used as ordered sets: duplicates are dropped as pages are merged
+            # and homepage entries stay first.
+            all_headings = dict.fromkeys(homepage_data.get("headings", []))
+            all_keywords = dict.fromkeys(homepage_data.get("keywords", []))
             pages_scanned = 1
 
-            for link in nav_links[:5]:
+            # Subpages are fetched concurrently, then processed in link order
+            subpage_links = nav_links[:5]
+            subpage_htmls = await asyncio.gather(*[
+                self.fetch_page_content(link["url"], timeout_ms=5000)
+                for link in subpage_links
+            ], return_exceptions=True)
+
+            for link, page_html in zip(subpage_links, subpage_htmls):
                 try:
-                    page_html = await self.fetch_page_content(link["url"], timeout_ms=5000)
+                    if isinstance(page_html, Exception):
+                        raise page_html
                     if page_html:
                         page_data = self.extract_page_metadata(page_html, link["url"])
-                        all_headings.extend(page_data.get("headings", []))
-                        all_keywords.extend(page_data.get("keywords", []))
+                        all_headings.update(dict.fromkeys(page_data.get("headings", [])))
+                        all_keywords.update(dict.fromkeys(page_data.get("keywords", [])))
                         pages_scanned += 1
                 except Exception as e:
                     console.log(f"Error scanning {link['url']}: {str(e)}")
 
-            # Remove duplicates
-            all_headings = list(set(all_headings))
-            all_keywords = list(set(all_keywords))
+            all_headings = list(all_headings)
+            all_keywords = list(all_keywords)
 
             # Analyze content with AI to identify niche and themes
             content_themes = []
@@ -3557,14 +4205,15 @@ Return ONLY a JSON object (no markdown):
                         "keywords": all_keywords[:30]
                     },
                     website,
-                    openai_key
+                    openai_key,
+                    limiter=limiter
                 )
                 if ai_analysis:
                     content_themes = ai_analysis.get("themes", [])
                     niche_description = ai_analysis.get("niche_description")
-                    # Add AI-extracted keywords
-                    all_keywords.extend(ai_analysis.get("keywords", []))
-                    all_keywords = list(set(all_keywords))
+                    # Add AI-extracted keywords ahead of the scraped ones so they
+                    # survive the 50-keyword storage limit
+                    all_keywords = list(dict.fromkeys(ai_analysis.get("keywords", []) + all_keywords))
 
             # Save scan results
             scan_data = {
@@ -3581,7 +4230,7 @@ Return ONLY a JSON object (no markdown):
             }
 
             await self.save_scan_results(website_id, scan_data, supabase_url, supabase_key)
-            console.log(f"Scan completed for {domain}: {len(all_keywords)} keywords, {len(content_themes)} themes")
+            self._log_info(f"Scan completed for {domain}: {len(all_keywords)} keywords, {len(content_themes)} themes")
             return True
 
         except Exception as e:
@@ -3599,8 +4248,6 @@ Return ONLY a JSON object (no markdown):
             url: The URL to fetch
             timeout_ms: Timeout in milliseconds (default 10 seconds)
         """
-        from js import AbortController, setTimeout
-
         try:
             headers = {
                 "User-Agent": "Mozilla/5.0 (compatible; SEOBot/1.0; +https://example.com/bot)",
@@ -3621,15 +4268,14 @@ Return ONLY a JSON object (no markdown):
             response = await fetch(url, to_js(options, dict_converter=Object.fromEntries))
 
             # Clear timeout if request completed
-            from js import clearTimeout
             clearTimeout(timeout_id)
 
             if response.ok:
                 text = await response.text()
                 # Handle JsProxy if needed
                 if hasattr(text, 'to_py'):
-                    return str(text)
-                return text
+                    text = str(text)
+                return text[:MAX_PAGE_HTML_CHARS]
             else:
                 console.log(f"Failed to fetch {url}: {response.status}")
                 return None
@@ -3643,8 +4289,6 @@ Return ONLY a JSON object (no markdown):
 
     def extract_page_metadata(self, html: str, url: str) -> dict:
         """Extract title, meta description, headings, and keywords from HTML using regex."""
-        import re
-
         result = {
             "url": url,
             "title": "",
@@ -3653,100 +4297,84 @@ Return ONLY a JSON object (no markdown):
             "keywords": []
         }
 
+        # Collect the first title, description and keywords tags plus every h1/h2
+        found = {}
+        h1_headings = []
+        h2_headings = []
+        for match in _PAGE_METADATA_RE.finditer(html):
+            group = match.lastgroup
+            if group == "heading_text":
+                cleaned = self._clean_text(match.group(group))
+                if cleaned and len(cleaned) > 2:
+                    if match.group("heading") in ("h1", "H1"):
+                        h1_headings.append(cleaned)
+                    else:
+                        h2_headings.append(cleaned)
+            elif group not in found:
+                found[group] = match.group(group)
+
         # Extract title
-        title_match = re.search(r'<title[^>]*>(.*?)</title>', html, re.IGNORECASE | re.DOTALL)
-        if title_match:
-            result["title"] = self._clean_text(title_match.group(1))
-
-        # Extract meta description
-        meta_match = re.search(
-            r'<meta[^>]*name=["\']description["\'][^>]*content=["\']([^"\']*)["\']',
-            html, re.IGNORECASE
-        )
-        if not meta_match:
-            meta_match = re.search(
-                r'<meta[^>]*content=["\']([^"\']*)["\'][^>]*name=["\']description["\']',
-                html, re.IGNORECASE
-            )
-        if meta_match:
-            result["meta_description"] = self._clean_text(meta_match.group(1))
-
-        # Extract h1 headings
-        h1_matches = re.findall(r'<h1[^>]*>(.*?)</h1>', html, re.IGNORECASE | re.DOTALL)
-        for h in h1_matches:
-            cleaned = self._clean_text(h)
-            if cleaned and len(cleaned) > 2:
-                result["headings"].append(cleaned)
-
-        # Extract h2 headings
-        h2_matches = re.findall(r'<h2[^>]*>(.*?)</h2>', html, re.IGNORECASE | re.DOTALL)
-        for h in h2_matches:
-            cleaned = self._clean_text(h)
-            if cleaned and len(cleaned) > 2:
-                result["headings"].append(cleaned)
+        if "title" in found:
+            result["title"] = self._clean_text(found["title"])
 
-        # Extract keywords from meta keywords tag
-        keywords_match = re.search(
-            r'<meta[^>]*name=["\']keywords["\'][^>]*content=["\']([^"\']*)["\']',
-            html, re.IGNORECASE
-        )
-        if keywords_match:
-            kws = keywords_match.group(1).split(',')
-            result["keywords"].extend([self._clean_text(k) for k in kws if k.strip()])
+        # Extract meta description (name before content preferred, as either order is valid)
+        description = found.get("description", found.get("description_reversed"))
+        if description is not None:
+            result["meta_description"] = self._clean_text(description)
 
-        # Extract keywords from headings (split on common separators)
-        for heading in result["headings"]:
-            words = re.split(r'[-–|:,]', heading)
-            for word in words:
-                word = word.strip().lower()
-                if len(word) > 3 and len(word) < 30:
-                    result["keywords"].append(word)
+        # h1 headings listed first
+        result["headings"] = h1_headings + h2_headings
 
-        # Extract keywords from title
-        if result["title"]:
-            words = re.split(r'[-–|:,]', result["title"])
-            for word in words:
+        # Keywords are collected into a dict used as an ordered set, so repeated
+        # heading words are dropped as they are found (first occurrence wins)
+        keywords = {}
+
+        # Extract keywords from meta keywords tag
+        if "keywords" in found:
+            for k in found["keywords"].split(','):
+                if k.strip():
+                    keywords[self._clean_text(k)] = None
+
+        # Extract keywords from headings, then the title (split on common separators)
+        sources = itertools.chain(result["headings"], (result["title"],) if result["title"] else ())
+        for source in sources:
+            for word in _KEYWORD_SEPARATOR_RE.split(source):
                 word = word.strip().lower()
                 if len(word) > 3 and len(word) < 30:
-                    result["keywords"].append(word)
+                    keywords[word] = None
 
-        # Remove duplicates
-        result["keywords"] = list(set(result["keywords"]))
+        result["keywords"] = list(keywords)
 
         return result
 
     def _clean_text(self, text: str) -> str:
         """Clean HTML text by removing tags and normalizing whitespace."""
-        import re
         # Remove HTML tags
-        text = re.sub(r'<[^>]+>', '', text)
+        if '<' in text:
+            text = _HTML_TAG_RE.sub('', text)
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text)
+        text = _WHITESPACE_RE.sub(' ', text)
         # Decode common HTML entities
-        text = text.replace('&amp;', '&').replace('&lt;', '<').replace('&gt;', '>')
-        text = text.replace('&quot;', '"').replace('&#39;', "'").replace('&nbsp;', ' ')
+        if '&' in text:
+            text = _HTML_ENTITY_RE.sub(lambda m: _HTML_ENTITIES[m.group()], text)
         return text.strip()
 
     def identify_navigation_links(self, html: str, base_domain: str) -> list:
         """Find main navigation links to scan (limit to internal pages)."""
-        import re
-
         links = []
         seen_urls = set()
 
-        # Look for links in nav elements
-        nav_sections = re.findall(r'<nav[^>]*>(.*?)</nav>', html, re.IGNORECASE | re.DOTALL)
-
-        # Also look in header
-        header_sections = re.findall(r'<header[^>]*>(.*?)</header>', html, re.IGNORECASE | re.DOTALL)
-
-        all_sections = nav_sections + header_sections
+        # Look for links in nav elements, then in the header. Sections and anchors are
+        # matched lazily so the scan stops as soon as the 10-link limit is reached.
+        all_sections = itertools.chain(
+            _NAV_SECTION_RE.finditer(html),
+            _HEADER_SECTION_RE.finditer(html)
+        )
 
         for section in all_sections:
             # Find all anchor tags
-            anchors = re.findall(r'<a[^>]*href=["\']([^"\']*)["\'][^>]*>(.*?)</a>', section, re.IGNORECASE | re.DOTALL)
-
-            for href, text in anchors:
+            for anchor in _ANCHOR_RE.finditer(section.group(1)):
+                href, text = anchor.groups()
                 # Skip empty, hash-only, or external links
                 if not href or href.startswith('#') or href.startswith('javascript:'):
                     continue
@@ -3775,14 +4403,17 @@ Return ONLY a JSON object (no markdown):
                         "url": url,
                         "text": link_text
                     })
+                    if len(links) == 10:  # Limit to 10 links
+                        return links
 
-        return links[:10]  # Limit to 10 links
+        return links
 
     async def analyze_content_with_ai(
         self,
         extracted_data: dict,
         website: dict,
-        api_key: str
+        api_key: str,
+        limiter: Optional[_AdaptiveLimiter] = None
     ) -> Optional[dict]:
         """Use GPT-4o to analyze extracted content and identify themes/niche."""
 
@@ -3810,36 +4441,23 @@ Return ONLY a JSON object (no markdown):
     "language": "detected language code (e.g., nl, en, de)"
 }}"""
 
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
+        headers = _openai_headers(api_key)
 
-        body = json.dumps({
-            "model": "gpt-4o",
-            "messages": [
-                {"role": "system", "content": "You are an SEO analyst. Analyze website content and identify its niche accurately. Return only valid JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            "max_tokens": 800,
-            "temperature": 0.3  # Lower temperature for more accurate analysis
-        })
+        body = _openai_chat_body(
+            "You are an SEO analyst. Analyze website content and identify its niche accurately. Return only valid JSON.",
+            prompt, 800, 0.3  # Lower temperature for more accurate analysis
+        )
 
         try:
-            response = await fetch(
+            response = await (limiter.fetch if limiter else fetch)(
                 "https://api.openai.com/v1/chat/completions",
                 self._make_options("POST", headers, body)
             )
 
             if response.ok:
-                data = await self._parse_json(response)
-                content = data["choices"][0]["message"]["content"]
-                content = content.strip()
-                if content.startswith("```"):
-                    content = content.split("```")[1]
-                    if content.startswith("json"):
-                        content = content[4:]
-                return json.loads(content)
+                content = await _chat_completion_text(response)
+                content = _strip_code_fence(content)
+                return _json_loads(content)
             else:
                 error = await response.text()
                 console.log(f"AI analysis error: {error}")
@@ -3854,18 +4472,22 @@ Return ONLY a JSON object (no markdown):
         supabase_url: str,
         supabase_key: str
     ) -> Optional[dict]:
-        """Retrieve existing scan data for a website."""
+        """Retrieve existing scan data for a website (cached briefly, see _WEBSITE_SCAN_CACHE)."""
+        cache_key = (supabase_url, website_id)
+        hit, scan = _ttl_cache_get(_WEBSITE_SCAN_CACHE, cache_key)
+        if hit:
+            return scan
+
         url = f"{supabase_url}/rest/v1/website_scans?website_id=eq.{website_id}&select=*"
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
+        headers = self._supabase_headers(supabase_key)
 
         response = await fetch(url, self._make_options("GET", headers))
 
         if response.ok:
             data = await self._parse_json(response)
-            return dict(data[0]) if data and len(data) > 0 else None
+            scan = data[0] if data else None
+            _ttl_cache_set(_WEBSITE_SCAN_CACHE, cache_key, scan, _WEBSITE_SCAN_TTL_SECONDS)
+            return scan
         return None
 
     async def save_scan_results(
@@ -3876,34 +4498,11 @@ Return ONLY a JSON object (no markdown):
         supabase_key: str
     ) -> bool:
         """Save or update scan results in the database."""
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json",
-            "Prefer": "return=representation"
-        }
-
-        # Check if scan record exists
-        existing = await self.get_website_scan(website_id, supabase_url, supabase_key)
-
         data = {
             "website_id": website_id,
             **scan_data
         }
-
-        if existing:
-            # Update existing record
-            response = await fetch(
-                f"{supabase_url}/rest/v1/website_scans?website_id=eq.{website_id}",
-                self._make_options("PATCH", headers, json.dumps(scan_data))
-            )
-        else:
-            # Insert new record
-            response = await fetch(
-                f"{supabase_url}/rest/v1/website_scans",
-                self._make_options("POST", headers, json.dumps(data))
-            )
-
+        response = await self._upsert_website_scan(data, supabase_url, supabase_key)
         return response.ok
 
     async def update_scan_status(
@@ -3915,30 +4514,27 @@ Return ONLY a JSON object (no markdown):
         error_message: str = None
     ):
         """Update the scan status for a website."""
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}",
-            "Content-Type": "application/json"
-        }
-
-        data = {"scan_status": status}
+        data = {"website_id": website_id, "scan_status": status}
         if error_message:
             data["error_message"] = error_message
 
-        # Check if record exists
-        existing = await self.get_website_scan(website_id, supabase_url, supabase_key)
+        await self._upsert_website_scan(data, supabase_url, supabase_key)
 
-        if existing:
-            await fetch(
-                f"{supabase_url}/rest/v1/website_scans?website_id=eq.{website_id}",
-                self._make_options("PATCH", headers, json.dumps(data))
-            )
-        else:
-            data["website_id"] = website_id
-            await fetch(
-                f"{supabase_url}/rest/v1/website_scans",
-                self._make_options("POST", headers, json.dumps(data))
-            )
+    async def _upsert_website_scan(self, data: dict, supabase_url: str, supabase_key: str):
+        """Insert or update a website's scan row in one request.
+
+        website_scans.website_id is unique, so PostgREST merges into the existing row
+        (only the given columns change) or inserts a new one.
+        """
+        headers = self._supabase_headers(
+            supabase_key, write=True, prefer="resolution=merge-duplicates,return=minimal"
+        )
+        response = await fetch(
+            f"{supabase_url}/rest/v1/website_scans?on_conflict=website_id",
+            self._make_options("POST", headers, _json_dumps(data))
+        )
+        _WEBSITE_SCAN_CACHE.pop((supabase_url, data["website_id"]), None)
+        return response
 
     # =============================================
     # GOOGLE CUSTOM SEARCH API FUNCTIONS
@@ -3951,21 +4547,26 @@ Return ONLY a JSON object (no markdown):
         supabase_key: str,
         encryption_key: str
     ) -> Optional[str]:
-        """Retrieve and decrypt a system key."""
+        """Retrieve and decrypt a system key (cached for _SYSTEM_KEY_TTL_SECONDS)."""
+        cache_key = (supabase_url, key_name)
+        hit, value = _ttl_cache_get(_SYSTEM_KEY_CACHE, cache_key)
+        if hit:
+            return value
+
         url = f"{supabase_url}/rest/v1/system_keys?key_name=eq.{key_name}&select=*"
-        headers = {
-            "apikey": supabase_key,
-            "Authorization": f"Bearer {supabase_key}"
-        }
+        headers = self._supabase_headers(supabase_key)
 
         response = await fetch(url, self._make_options("GET", headers))
 
         if response.ok:
             data = await self._parse_json(response)
-            if data and len(data) > 0:
+            if data:
                 encrypted_value = data[0].get("key_value_encrypted")
                 if encrypted_value:
-                    return await self._decrypt(encrypted_value, encryption_key)
+                    value = await self._decrypt(encrypted_value, encryption_key)
+                    if value:
+                        _ttl_cache_set(_SYSTEM_KEY_CACHE, cache_key, value, _SYSTEM_KEY_TTL_SECONDS)
+                    return value
         return None
 
     async def search_google(
@@ -3973,12 +4574,12 @@ Return ONLY a JSON object (no markdown):
         query: str,
         api_key: str,
         cx_id: str,
-        language: str = "en"
+        language: str = "en",
+        limiter: Optional[_AdaptiveLimiter] = None
     ) -> list:
         """Execute a Google Custom Search API request."""
         try:
             # URL encode the query
-            from urllib.parse import quote
             encoded_query = quote(query)
 
             # Map language codes
@@ -3993,7 +4594,7 @@ Return ONLY a JSON object (no markdown):
                 f"&num=10"
             )
 
-            response = await fetch(url, self._make_options("GET"))
+            response = await (limiter.fetch if limiter else fetch)(url, self._make_options("GET"))
 
             if response.ok:
                 data = await self._parse_json(response)
@@ -4051,22 +4652,32 @@ Return ONLY a JSON object (no markdown):
         google_api_key: str,
         google_cx_id: str,
         supabase_url: str,
-        supabase_key: str
+        supabase_key: str,
+        limiter: Optional[_AdaptiveLimiter] = None
     ) -> list:
         """Discover topics using Google Custom Search API."""
         queries = self.build_search_queries(scan_data, website)
-        all_results = []
+        language = website.get("language", "en-US")
 
-        for query in queries[:5]:  # Limit API calls
-            results = await self.search_google(
-                query,
-                google_api_key,
-                google_cx_id,
-                website.get("language", "en-US")
-            )
+        # Run the searches concurrently; at most 5 queries, so the fan-out is already bounded
+        results_lists = await asyncio.gather(*[
+            self.search_google(query, google_api_key, google_cx_id, language, limiter=limiter)
+            for query in queries[:5]  # Limit API calls
+        ], return_exceptions=True)
+
+        all_results = []
+        for results in results_lists:
+            if isinstance(results, Exception):
+                console.log(f"Google Search failed: {str(results)}")
+                continue
             all_results.extend(results)
 
-        # Convert search results to topic suggestions
+        # Convert search results to topic suggestions. Themes are lowercased once; a
+        # keyword equal to one of their words is a match without any substring scans.
+        themes = scan_data.get("content_themes") or []
+        themes_lower = [theme.lower() for theme in themes]
+        theme_tokens = {token for theme in themes_lower for token in theme.split()}
+        category = themes[0] if themes else "general"
         topics = []
         seen_titles = set()
 
@@ -4080,21 +4691,21 @@ Return ONLY a JSON object (no markdown):
                 continue
             seen_titles.add(title.lower())
 
-            # Extract keywords from title and snippet
+            # Extract keywords from title and snippet (already lowercased)
             keywords = self._extract_keywords_from_text(f"{title} {snippet}")
 
             # Filter keywords to match website themes
             relevant_keywords = [
                 kw for kw in keywords
-                if any(theme.lower() in kw.lower() or kw.lower() in theme.lower()
-                       for theme in scan_data.get("content_themes", []))
+                if kw in theme_tokens
+                or any(theme in kw or kw in theme for theme in themes_lower)
             ]
 
             if len(relevant_keywords) >= 2:
                 topics.append({
                     "title": title,
                     "keywords": relevant_keywords[:5],
-                    "category": scan_data.get("content_themes", ["general"])[0] if scan_data.get("content_themes") else "general",
+                    "category": category,
                     "priority": 6,
                     "source": "google_search",
                     "discovery_context": {
@@ -4107,27 +4718,14 @@ Return ONLY a JSON object (no markdown):
 
     def _extract_keywords_from_text(self, text: str) -> list:
         """Extract potential keywords from text."""
-        import re
-
         # Clean and lowercase
-        text = text.lower()
-        text = re.sub(r'[^\w\s]', ' ', text)
-
-        # Split into words
-        words = text.split()
+        text = _NON_WORD_RE.sub(' ', text.lower())
 
         # Filter: length between 4-25 chars, not common stop words
-        stop_words = {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'can', 'her',
-                      'was', 'one', 'our', 'out', 'het', 'een', 'van', 'voor', 'met', 'zijn'}
-
-        keywords = [w for w in words if len(w) >= 4 and len(w) <= 25 and w not in stop_words]
+        keywords = [
+            w for w in text.split()
+            if 4 <= len(w) <= 25 and w not in _KEYWORD_STOP_WORDS
+        ]
 
         # Remove duplicates while preserving order
-        seen = set()
-        unique = []
-        for kw in keywords:
-            if kw not in seen:
-                seen.add(kw)
-                unique.append(kw)
-
-        return unique[:15]
+        return list(dict.fromkeys(keywords))[:15]